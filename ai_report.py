@@ -0,0 +1,297 @@
+import functools
+import json
+import re
+import time
+from string import Template
+
+# --- AI 리포트 생성 공통 로직 ---
+# app.py(페이지 3)와 로컬 stub 서버 테스트가 같은 프롬프트/호출 코드를 쓰도록 분리했습니다.
+# openai와 tiktoken은 import가 무거우므로 실제로 호출할 때 불러옵니다. (페이지 0 첫 화면과 무관하게)
+
+REPORT_MODEL = "gpt-4o" # You can choose other models like "gpt-3.5-turbo" if needed
+REPORT_MAX_TOKENS = 800 # Adjust as needed
+REPORT_TEMPERATURE = 0.7 # Adjust creativity (0.0-1.0)
+
+# 프롬프트 문구나 리포트 양식을 바꾸면 이 값을 올려주세요. 리포트 캐시 키에 포함되어 이전 리포트가 재사용되지 않습니다.
+PROMPT_VERSION = 3
+
+# 캐시 가능한 프롬프트에서 이름/소요 시간 대신 들어가는 자리표시자
+NAME_PLACEHOLDER = "{{NAME}}"
+ELAPSED_PLACEHOLDER = "{{ELAPSED}}"
+
+# 서킷이 열렸거나 대기열이 가득 찼을 때 GPT 대신 바로 보여주는 기본 리포트
+DEGRADED_REPORT = f"""## 📌 {NAME_PLACEHOLDER}님이 마주한 '디지털 장벽'
+
+폼을 작성하는 데 **{ELAPSED_PLACEHOLDER}초**가 걸렸습니다. 이 시간은 {NAME_PLACEHOLDER}님이 겪었을 **심리적, 인지적 부담**을 보여주는 지표입니다.
+
+지금은 참여자가 많아 AI 분석을 잠시 제공하지 못하고 있습니다. 작은 글씨, 어려운 용어, 긴 안내문처럼 **사소하게 느껴지는 불편함**이 누군가에게는 매일 마주하는 장벽이라는 점을 기억해 주세요.
+"""
+
+# --- 프롬프트 ---
+# 고정 지침은 모두 시스템 메시지(REPORT_SYSTEM_PREFIX) 하나에 두고 매 요청 글자 하나 바꾸지 않습니다.
+# (요청 앞부분이 같으면 공급자 쪽 프롬프트 캐시가 적용될 수 있음. OpenAI는 1024토큰 이상의 접두사부터 캐시)
+# 요청마다 달라지는 것은 짧은 사용자 메시지(역할, 소요 시간 구간)뿐이고, 모델은 바뀌는 부분
+# (어려움 3가지, 개선 방안 3가지)만 JSON으로 돌려줍니다. 고정 문단은 REPORT_TEMPLATE으로 여기서 조립합니다.
+
+REPORT_SYSTEM_PREFIX = """당신은 사용자가 겪은 어려움에 깊이 공감하고, 디지털 포용의 중요성을 알기 쉽게 설명해주는 '디지털 포용 경험 컨설턴트'입니다.
+사용자는 '디지털 격차 시뮬레이션'에 참여해, 부여된 역할의 입장에서 일부러 읽기 어렵게 만든 지원금 신청서를 방금 작성했습니다.
+리포트의 도입 문단과 맺음말은 앱이 직접 채우므로, 당신은 아래 JSON의 항목만 작성합니다.
+
+[작성 지침]
+1. 친절하고 공감적인 존댓말을 사용하세요. 사용자의 이름은 쓰지 마세요. (앱이 채웁니다)
+2. difficulties: 해당 역할군이 디지털 환경에서 흔히 겪는 현실적인 어려움을 정확히 3가지 작성합니다.
+   - title: 짧은 명사구 (예: '시각적 피로감', '정보 이해의 어려움', '심리적 불안감')
+   - description: 원인과 그때의 감정을 연결해 1-2문장으로 구체적으로 서술
+3. proposals: 이러한 장벽을 허물기 위한 구체적인 개선 방안을 측면별로 1-2문장씩 작성합니다.
+   - design: 사용자 인터페이스(UI) 개선 (예: 글자 크기 조절 기능, 직관적인 아이콘)
+   - content: 정보 제공 방식 개선 (예: 쉬운 용어와 설명, 음성 안내(TTS))
+   - social: 교육이나 정책 (예: 찾아가는 디지털 교육, 공공 키오스크 접근성 가이드라인 의무화)
+4. 소요 시간이 길수록 사용자가 겪었을 부담을 더 구체적으로 짚어주세요.
+5. 핵심 키워드는 **볼드체**로 강조할 수 있습니다. 마크다운 제목(#)이나 목록 기호는 쓰지 마세요.
+
+[응답 형식] 아래 JSON 객체 하나만 출력하세요.
+{"difficulties": [{"title": "...", "description": "..."}, {"title": "...", "description": "..."}, {"title": "...", "description": "..."}], "proposals": {"design": "...", "content": "...", "social": "..."}}"""
+
+_STRING = {"type": "string"}
+REPORT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "digital_inclusion_report",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "additionalProperties": False,
+            "required": ["difficulties", "proposals"],
+            "properties": {
+                "difficulties": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "required": ["title", "description"],
+                        "properties": {"title": _STRING, "description": _STRING},
+                    },
+                },
+                "proposals": {
+                    "type": "object",
+                    "additionalProperties": False,
+                    "required": ["design", "content", "social"],
+                    "properties": {"design": _STRING, "content": _STRING, "social": _STRING},
+                },
+            },
+        },
+    },
+}
+
+PROPOSAL_LABELS = (('design', '디자인 측면'), ('content', '콘텐츠 측면'), ('social', '사회적 측면'))
+
+# 리포트 양식 (이름/소요 시간은 캐시 공유를 위해 자리표시자로 둠)
+REPORT_TEMPLATE = Template(f"""## 📌 {NAME_PLACEHOLDER}님이 마주한 '디지털 장벽' 분석
+
+'$role' 역할로 폼을 작성하는 데 **{ELAPSED_PLACEHOLDER}초**가 걸렸습니다. 이 시간은 단순히 숫자를 넘어, {NAME_PLACEHOLDER}님이 겪었을 **심리적, 인지적 부담**을 보여주는 지표입니다. 아마 익숙하지 않은 화면 구성이나 작은 글씨 때문에 망설이거나, 정보를 여러 번 확인하는 과정이 필요했을 수 있습니다. 이처럼 **사소하게 느껴지는 불편함**이 바로 디지털 세상에서 누군가는 매일 마주하는 '보이지 않는 장벽'입니다.
+
+## 🔍 '$role' 역할군이 겪는 현실적인 어려움
+
+{NAME_PLACEHOLDER}님이 경험하신 어려움은 비단 개인의 문제만은 아닙니다. '$role' 역할군이 디지털 환경에서 흔히 겪는 문제들은 다음과 같습니다.
+$difficulties
+
+## 💡 모두를 위한 디지털 세상을 만드는 구체적인 방법
+
+이러한 디지털 장벽을 허물기 위해 우리는 무엇을 할 수 있을까요? 몇 가지 구체적인 개선 방안을 제안합니다.
+$proposals
+
+## ✨ 오늘의 경험이 우리에게 남긴 것
+
+오늘 {NAME_PLACEHOLDER}님이 잠시나마 겪었던 불편함은, 우리 사회가 **'디지털 포용'**으로 나아가기 위해 풀어야 할 중요한 숙제입니다. 이 경험을 통해 나와 다른 입장의 사람들을 한 번 더 생각해볼 수 있는 계기가 되셨기를 바랍니다. 기술의 발전이 **소외가 아닌 연결**을 만드는 데 기여할 수 있도록, {NAME_PLACEHOLDER}님의 작은 관심이 큰 변화의 시작이 될 수 있습니다.
+""")
+
+
+class ReportFormatError(ValueError):
+    """모델 응답이 약속한 JSON 형식이 아닐 때"""
+
+
+def elapsed_time_bucket(elapsed_time_seconds, bucket_seconds):
+    """소요 시간을 bucket_seconds 단위 구간의 인덱스로 바꿉니다. (예: 10초 단위면 23.4초 -> 2)"""
+    return int(max(elapsed_time_seconds, 0) // bucket_seconds)
+
+
+def build_report_messages(role, bucket, bucket_seconds):
+    """
+    고정 시스템 메시지 + (역할, 소요 시간 구간)만 담은 짧은 사용자 메시지.
+    이름과 정확한 시간은 모델에 보내지 않으므로 같은 (역할, 구간)의 리포트를 여러 사용자가 공유할 수 있고,
+    리포트의 이름/시간은 fill_report_placeholders()로 나중에 채웁니다.
+    """
+    low = bucket * bucket_seconds
+    high = low + bucket_seconds
+    # :g로 써서 구간 폭이 10이든 10.0이든 같은 문장("10초 이상 20초 미만")이 되게 합니다. (앱과 배치의 프롬프트가 같아야 함)
+    return [
+        {"role": "system", "content": REPORT_SYSTEM_PREFIX},
+        {"role": "user", "content": f"- 부여된 역할: '{role}'\n- 폼 작성 소요 시간: {low:g}초 이상 {high:g}초 미만"},
+    ]
+
+
+def fill_report_placeholders(report, name, elapsed_time_seconds):
+    return report.replace(NAME_PLACEHOLDER, name).replace(ELAPSED_PLACEHOLDER, f"{elapsed_time_seconds:.1f}")
+
+
+def parse_report_json(text):
+    """모델 응답(JSON)을 {'difficulties': [...], 'proposals': {...}}로 바꿉니다. 형식이 다르면 ReportFormatError."""
+    try:
+        data = json.loads(text)
+        difficulties = [{'title': str(d['title']), 'description': str(d['description'])} for d in data['difficulties']]
+        proposals = {key: str(data['proposals'][key]) for key, _ in PROPOSAL_LABELS}
+    except (ValueError, KeyError, TypeError) as e:
+        raise ReportFormatError(f"LLM response is not a valid report JSON: {e}") from e
+    if not difficulties:
+        raise ReportFormatError("LLM response has no difficulties")
+    return {'difficulties': difficulties[:3], 'proposals': proposals}
+
+
+_JSON_STRING = r'"((?:[^"\\]|\\.)*)"'
+_DIFFICULTY_PATTERN = re.compile(r'\{\s*"title"\s*:\s*' + _JSON_STRING + r'\s*,\s*"description"\s*:\s*' + _JSON_STRING)
+_PROPOSAL_PATTERNS = [(key, re.compile(f'"{key}"\\s*:\\s*' + _JSON_STRING)) for key, _ in PROPOSAL_LABELS]
+
+
+def parse_partial_report_json(text):
+    """
+    스트리밍 중인(아직 닫히지 않은) JSON에서 값이 완성된 항목만 꺼냅니다.
+    화면에 리포트를 조금씩 채워 보여줄 때 사용합니다.
+    """
+    decode = lambda value: json.loads(f'"{value}"')
+    difficulties = [
+        {'title': decode(title), 'description': decode(description)}
+        for title, description in _DIFFICULTY_PATTERN.findall(text)
+    ]
+    proposals = {}
+    for key, pattern in _PROPOSAL_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            proposals[key] = decode(match.group(1))
+    return {'difficulties': difficulties[:3], 'proposals': proposals}
+
+
+def assemble_report(role, data):
+    """고정 문단 템플릿에 모델이 만든 항목을 끼워 넣어 마크다운 리포트를 만듭니다. (빠진 항목은 생략)"""
+    difficulties = '\n'.join(f"* **{d['title']}**: {d['description']}" for d in data['difficulties'])
+    proposals = '\n'.join(
+        f"* **{label}**: {data['proposals'][key]}" for key, label in PROPOSAL_LABELS if key in data['proposals']
+    )
+    return REPORT_TEMPLATE.substitute(role=role, difficulties=difficulties, proposals=proposals)
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding():
+    try:
+        import tiktoken # 있으면 정확한 토큰 수를, 없으면 근사치를 씁니다.
+        return tiktoken.encoding_for_model(REPORT_MODEL)
+    except Exception: # 설치되지 않았거나 인코딩 파일을 내려받지 못하는 환경 등
+        return None
+
+
+def count_tokens(text):
+    """
+    로컬 토큰 수. tiktoken이 있으면 정확히 세고, 없으면 근사치를 씁니다.
+    (근사: 한글 등 비ASCII 문자는 글자당 1토큰, ASCII는 4글자당 1토큰 - 한국어에서는 약간 많게 나옴)
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    non_ascii = sum(1 for c in text if ord(c) > 127)
+    return non_ascii + -(-(len(text) - non_ascii) // 4)
+
+
+def count_message_tokens(messages):
+    # 메시지마다 역할 표시 등으로 몇 토큰씩 더 붙습니다.
+    return sum(count_tokens(message['content']) + 4 for message in messages) + 2
+
+
+def token_usage(usage):
+    """API 응답의 usage에서 토큰 수를 꺼냅니다. (usage를 주지 않는 호환 서버면 None)"""
+    return {
+        'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+        'completion_tokens': getattr(usage, 'completion_tokens', None),
+    }
+
+
+def generate_report(client, messages, response_format=None):
+    """
+    스트리밍 없이 전체 응답을 한 번에 받아옵니다.
+    client는 openai.OpenAI 클라이언트입니다. (report_backends.OpenAIBackend가 만들어 넘김)
+    반환값: (리포트 텍스트, 타이밍 dict)
+    """
+    started = time.perf_counter()
+    response = client.chat.completions.create(
+        model=REPORT_MODEL,
+        messages=messages,
+        max_tokens=REPORT_MAX_TOKENS,
+        temperature=REPORT_TEMPERATURE,
+        **({'response_format': response_format} if response_format else {}),
+    )
+    total = time.perf_counter() - started
+    # 비스트리밍 모드에서는 첫 토큰 시간이 곧 전체 생성 시간입니다.
+    timing = dict({'ttft': total, 'total': total}, **token_usage(response.usage))
+    return response.choices[0].message.content, timing
+
+
+def stream_report(client, messages, on_chunk=None, response_format=None):
+    """
+    응답을 토큰(청크) 단위로 받아오며, 청크가 도착할 때마다
+    지금까지 누적된 텍스트로 on_chunk(text)를 호출합니다.
+    반환값: (최종 리포트 텍스트, 타이밍 dict)
+      - ttft: 요청 시작부터 첫 토큰 도착까지 걸린 시간(초)
+      - total: 요청 시작부터 스트림 종료까지 걸린 시간(초)
+      - prompt_tokens / completion_tokens: 마지막 청크의 usage (없으면 None)
+    """
+    started = time.perf_counter()
+    first_token_at = None
+    parts = []
+    usage = None
+
+    stream = client.chat.completions.create(
+        model=REPORT_MODEL,
+        messages=messages,
+        max_tokens=REPORT_MAX_TOKENS,
+        temperature=REPORT_TEMPERATURE,
+        stream=True,
+        **({'response_format': response_format} if response_format else {}),
+        stream_options={"include_usage": True}, # 마지막 청크에 토큰 사용량을 받음
+    )
+    for chunk in stream:
+        if getattr(chunk, 'usage', None) is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        parts.append(delta)
+        if on_chunk is not None:
+            on_chunk(''.join(parts))
+
+    finished = time.perf_counter()
+    timing = {
+        'ttft': (first_token_at if first_token_at is not None else finished) - started,
+        'total': finished - started,
+        **token_usage(usage),
+    }
+    return ''.join(parts), timing
+
+
+def request_report(client, role, messages, stream=True, on_update=None):
+    """
+    구조화된 리포트를 요청하고 고정 문단과 합친 마크다운 리포트를 돌려줍니다.
+    stream=True면 JSON이 도착하는 대로 지금까지 완성된 항목으로 조립한 리포트를 on_update(text)로 넘깁니다.
+    반환값: (리포트 마크다운, 타이밍 dict). 타이밍에는 로컬에서 센 입력/출력 토큰 수가 추가됩니다.
+    """
+    if stream:
+        on_chunk = None
+        if on_update is not None:
+            on_chunk = lambda text: on_update(assemble_report(role, parse_partial_report_json(text)))
+        raw, timing = stream_report(client, messages, on_chunk=on_chunk, response_format=REPORT_RESPONSE_FORMAT)
+    else:
+        raw, timing = generate_report(client, messages, response_format=REPORT_RESPONSE_FORMAT)
+    timing['local_prompt_tokens'] = count_message_tokens(messages)
+    timing['local_completion_tokens'] = count_tokens(raw)
+    return assemble_report(role, parse_report_json(raw)), timing
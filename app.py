@@ -1,19 +1,64 @@
+import hmac
+import secrets
 import streamlit as st
 import time
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import openai # Import the openai library
+import threading
+import uuid
+from ai_report import DEGRADED_REPORT, PROMPT_VERSION, elapsed_time_bucket, fill_report_placeholders
+from completion_stats import CompletionStats
+from report_cache import InflightRequests, ReportCache, make_cache_key
+from page_renderer import PageRenderer, load_style_block, start_render_stats
+from report_render import markdown_to_html, render_report
+from llm_dispatcher import CircuitBreaker, CircuitOpenError, LLMDispatcher, QueueFullError, jittered_poll_interval
+from scenarios import SCENARIO_SPEC_PATH, compile_scenarios, load_scenario_specs
+from telemetry import DEFAULT_TELEMETRY_DIR, EventLog, iter_completions
+from metrics import Metrics, start_metrics_server
+from report_backends import make_report_backends, resolve_backend_names
+from session_store import DEFAULT_SESSION_DB, SessionStore
+from shared_store import make_shared_store
 
 # Set Streamlit page config
 st.set_page_config(layout="centered", initial_sidebar_state="collapsed")
 
+rerun_started = time.perf_counter()
+rerun_page = str(st.session_state.get('current_page', 0))
+
+def secret(name, default=None):
+    # secrets.toml이 아예 없으면 st.secrets.get도 예외를 던지므로, 이때는 모든 설정에 기본값을 씁니다.
+    try:
+        return st.secrets.get(name, default)
+    except FileNotFoundError:
+        return default
+
+@st.cache_resource
+def get_metrics():
+    # METRICS_ENABLED = true 일 때만 계측합니다. METRICS_PORT를 주면 http://127.0.0.1:<port>/metrics 로 내보냅니다.
+    enabled = secret("METRICS_ENABLED", False)
+    port = secret("METRICS_PORT")
+    metrics = Metrics(enabled=enabled)
+    if enabled and port:
+        start_metrics_server(metrics, int(port))
+    return metrics
+
+metrics = get_metrics()
+# 이번 rerun에서 보내는 delta 수/바이트 수 측정 (맨 아래에서 st.session_state.render_stats에 저장)
+# Streamlit 내부 API를 감싸므로 계측을 켠 경우(벤치마크 등)에만 설치합니다.
+render_stats = start_render_stats() if metrics.enabled else None
+
+@st.cache_resource
+def get_style_block():
+    # style.css는 프로세스당 한 번만 읽고 압축해 둡니다.
+    return load_style_block()
+
+@st.cache_resource
+def get_page_renderer():
+    return PageRenderer()
 
 # Custom CSS for styling
 # Load custom CSS from style.css file
 try:
-    with open('style.css', encoding='utf-8') as f: # <-- 여기에 encoding='utf-8' 추가
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    with metrics.section('css', rerun_page):
+        st.markdown(get_style_block(), unsafe_allow_html=True)
 except FileNotFoundError:
     st.error("Error: style.css not found. Please make sure style.css is in the same directory.")
     st.stop()
@@ -27,364 +72,554 @@ if 'start_time' not in st.session_state:
     st.session_state.start_time = 0
 if 'end_time' not in st.session_state:
     st.session_state.end_time = 0
-if 'name' not in st.session_state:
-    st.session_state.name = ''
-if 'address' not in st.session_state:
-    st.session_state.address = ''
+# 입력값/체크 여부는 역할을 고를 때 그 역할의 항목만 만듭니다. (start_scenario 참고)
+if 'form_values' not in st.session_state:
+    st.session_state.form_values = {}
 if 'checkboxes' not in st.session_state:
-    st.session_state.checkboxes = {
-        'check1_elderly': False, 'check2_elderly': False, 'check3_elderly': False,
-        'check1_foreigner': False, 'check2_foreigner': False, 'check3_foreigner': False,
-    }
+    st.session_state.checkboxes = {}
 if 'ai_report_content' not in st.session_state:
     st.session_state.ai_report_content = None
+if 'ai_report_timing' not in st.session_state:
+    st.session_state.ai_report_timing = None
+if 'ai_report_rendered' not in st.session_state:
+    st.session_state.ai_report_rendered = None # 완성된 리포트의 HTML 조각과 내용 해시 (report_render.render_report)
+if 'speculative_report' not in st.session_state:
+    st.session_state.speculative_report = None
+if 'participant_id' not in st.session_state:
+    st.session_state.participant_id = ''
+if 'form_tracking' not in st.session_state:
+    st.session_state.form_tracking = None
+if 'completion_rank' not in st.session_state:
+    st.session_state.completion_rank = None
+
+# --- 서버 측 세션 저장 (secrets.toml 에서 SESSION_PERSISTENCE = false 로 끌 수 있음) ---
+# 재접속/새로 고침 후에도 URL의 ?s=<토큰>으로 진행 상태와 생성된 리포트를 복원합니다.
+SESSION_PERSISTENCE = secret("SESSION_PERSISTENCE", True)
+# 이름/주소 같은 입력값(form_values)은 저장하지 않습니다. 리포트도 이름 자리표시자가 남은 원문으로 저장하고
+# 화면에 그릴 때 채우므로, 토큰만 알아서는 참여자의 개인정보를 읽을 수 없습니다.
+# (그래서 페이지 2에서 재접속하면 입력칸과 체크박스는 비어 있고, 소요 시간은 이어서 잽니다)
+PERSISTED_SESSION_KEYS = (
+    'current_page', 'selected_role', 'start_time', 'end_time',
+    'elapsed_time_for_report', 'ai_report_content', 'ai_report_timing', 'participant_id',
+    'form_tracking', 'completion_rank',
+)
+
+@st.cache_resource
+def get_session_store():
+    store = SessionStore(
+        path=secret("SESSION_DB", str(DEFAULT_SESSION_DB)),
+        ttl_seconds=secret("SESSION_TTL_SECONDS", 6 * 60 * 60),
+        max_cached=secret("SESSION_CACHE_ENTRIES", 512),
+        max_session_bytes=secret("SESSION_MAX_BYTES", 64 * 1024),
+    )
+    for stat in ('cached', 'stored'):
+        metrics.gauge(f'sessions_{stat}', f"Persisted sessions ({stat})", lambda stat=stat: store.stats()[stat])
+    return store
+
+def restore_session():
+    """이 브라우저 세션의 첫 rerun에서 한 번만 호출됩니다. 토큰이 없거나 만료되었으면 새 토큰을 URL에 넣습니다."""
+    token = st.query_params.get('s')
+    state = get_session_store().load(token) if token else None
+    if state is None:
+        token = secrets.token_urlsafe(16)
+        st.query_params['s'] = token
+    else:
+        for key, value in state.items():
+            if key in PERSISTED_SESSION_KEYS:
+                st.session_state[key] = value
+    st.session_state.session_token = token
+
+def persist_session():
+    token = st.session_state.get('session_token')
+    if SESSION_PERSISTENCE and token:
+        get_session_store().save(
+            token, {key: st.session_state[key] for key in PERSISTED_SESSION_KEYS if key in st.session_state}
+        )
 
-# Set OpenAI API key
-if "OPENAI_API_KEY" in st.secrets:
-    openai.api_key = st.secrets["OPENAI_API_KEY"]
-else:
-    st.error("OpenAI API key not found in secrets.toml. Please add it.")
-    st.stop() # Stop the app if the key is not found
+def forget_session():
+    """참여를 마치고 처음으로 돌아갈 때 저장된 세션을 지우고 새 토큰을 씁니다. (다음 참여자가 이어받지 않도록)"""
+    token = st.session_state.get('session_token')
+    if SESSION_PERSISTENCE and token:
+        get_session_store().delete(token)
+        st.session_state.session_token = secrets.token_urlsafe(16)
+        st.query_params['s'] = st.session_state.session_token
 
-def set_page(page_index):
-    st.session_state.current_page = page_index
-    st.rerun()
+if SESSION_PERSISTENCE and 'session_token' not in st.session_state:
+    restore_session()
 
-def check_form_validity():
-    name_filled = bool(st.session_state.name.strip())
-    address_filled = bool(st.session_state.address.strip())
-
-    correct_checkboxes_selected = True
-    if st.session_state.selected_role == 'elderly':
-        if not st.session_state.checkboxes['check1_elderly']:
-            correct_checkboxes_selected = False
-        if st.session_state.checkboxes['check2_elderly']:
-            correct_checkboxes_selected = False
-        if not st.session_state.checkboxes['check3_elderly']:
-            correct_checkboxes_selected = False
-    elif st.session_state.selected_role == 'foreigner':
-        if not st.session_state.checkboxes['check1_foreigner']:
-            correct_checkboxes_selected = False
-        if st.session_state.checkboxes['check2_foreigner']:
-            correct_checkboxes_selected = False
-        if not st.session_state.checkboxes['check3_foreigner']:
-            correct_checkboxes_selected = False
-
-    return name_filled and address_filled and correct_checkboxes_selected
+# 리포트를 토큰 단위로 스트리밍할지 여부 (secrets.toml 에서 REPORT_STREAMING = false 로 끌 수 있음)
+REPORT_STREAMING = secret("REPORT_STREAMING", True)
 
-# --- AI Report Generation Function (MODIFIED) ---
-def get_ai_report(role, form_data, elapsed_time_seconds):
-    # Construct the prompt for GPT
-    prompt = f"""
-        당신은 사용자가 겪은 어려움에 깊이 공감하고, 디지털 포용의 중요성을 알기 쉽게 설명해주는 '디지털 포용 경험 컨설턴트'입니다.
-        사용자는 당신이 만든 '디지털 격차 시뮬레이션'에 참여했으며, 방금 과제를 마쳤습니다. 이제 그 경험을 바탕으로 개인화된 분석 리포트를 작성해주세요.
+# 리포트 캐시의 소요 시간 구간 폭(초). 넓을수록 캐시 적중률이 오르지만 리포트가 덜 개인화됩니다.
+REPORT_CACHE_BUCKET_SECONDS = secret("REPORT_CACHE_BUCKET_SECONDS", 10)
 
-        [시뮬레이션 정보]
-        - 부여된 역할: '{role}'
-        - 폼 작성 소요 시간: {elapsed_time_seconds:.1f}초
-        - 신청자 이름: '{form_data['name']}'
+# 리포트 백엔드 순서. 앞의 것이 실패하거나 느리면 다음 것으로 넘어갑니다. ('openai'는 OPENAI_API_KEY가 있어야 사용)
+# 네트워크가 없는 행사장에서는 ["local"]로 두면 LLM 없이 바로 리포트를 만듭니다.
+REPORT_BACKENDS = secret("REPORT_BACKENDS", ["openai", "local"])
+# 원격 백엔드를 이만큼(초) 기다려도 끝나지 않거나, 대기열이 이만큼 쌓여 있으면 다음 백엔드로 넘깁니다. (0이면 끔)
+REPORT_SHED_SECONDS = secret("REPORT_SHED_SECONDS", 20)
+REPORT_SHED_QUEUE_DEPTH = secret("REPORT_SHED_QUEUE_DEPTH", 50)
 
-        [리포트 작성 지침]
-        1.  **친절하고 공감적인 어투**를 사용하며, '{form_data['name']}님'처럼 사용자의 이름을 직접 불러주세요.
-        2.  아래의 **4가지 섹션 구조**를 반드시 지켜서, 마크다운 형식으로 리포트를 작성해주세요.
-        3.  핵심 키워드는 **볼드체**로 강조하고, 리스트는 글머리 기호(bullet point)를 사용해 가독성을 높여주세요.
-        4.  각 섹션의 내용은 단순히 정보를 나열하는 것을 넘어, 사용자의 경험과 감정을 연결하여 의미를 부여해야 합니다.
-        5.  전체 내용은 최소 300자 이상으로 풍부하게 작성해주세요.
+# 복제본 여러 개를 띄울 때 생성된 리포트와 완료 시간 집계를 함께 쓰는 저장소 (예: "sqlite:///shared/huss.sqlite3")
+# 지정하지 않으면 지금처럼 프로세스마다 따로 둡니다.
+SHARED_STORE = secret("SHARED_STORE")
 
-        ---
+@st.cache_resource
+def get_shared_store():
+    return make_shared_store(SHARED_STORE) if SHARED_STORE else None
 
-        [리포트 양식]
+@st.cache_resource
+def get_report_backend_names(names, openai_api_key):
+    # 설정값마다 한 번만 검사합니다 (API 키가 없다는 경고도 rerun마다가 아니라 한 번만 남음).
+    return resolve_backend_names(names, openai_api_key)
 
-        ## 📌 {form_data['name']}님이 마주한 '디지털 장벽' 분석
+try:
+    # 백엔드 객체(openai import 포함)는 처음 쓸 때 만들지만, 설정 오류는 시작할 때 바로 알립니다.
+    get_report_backend_names(REPORT_BACKENDS, secret("OPENAI_API_KEY"))
+except ValueError as e:
+    st.error(f"Invalid report backend settings in secrets.toml: {e}")
+    st.stop()
 
-        '{role}' 역할로 폼을 작성하는 데 **{elapsed_time_seconds:.1f}초**가 걸렸습니다. 이 시간은 단순히 숫자를 넘어, {form_data['name']}님이 겪었을 **심리적, 인지적 부담**을 보여주는 지표입니다. 아마 익숙하지 않은 화면 구성이나 작은 글씨 때문에 망설이거나, 정보를 여러 번 확인하는 과정이 필요했을 수 있습니다. 이처럼 **사소하게 느껴지는 불편함**이 바로 디지털 세상에서 누군가는 매일 마주하는 '보이지 않는 장벽'입니다.
+@st.cache_resource
+def get_report_backends():
+    # OPENAI_BASE_URL을 지정하면 로컬 OpenAI 호환 서버(stub_openai_server.py 등)로 요청합니다.
+    return make_report_backends(
+        get_report_backend_names(REPORT_BACKENDS, secret("OPENAI_API_KEY")),
+        openai_api_key=secret("OPENAI_API_KEY"),
+        openai_base_url=secret("OPENAI_BASE_URL"),
+        bucket_seconds=REPORT_CACHE_BUCKET_SECONDS,
+        streaming=REPORT_STREAMING,
+        role_labels={role: scenario.report_label for role, scenario in get_scenarios().items()},
+    )
 
-        ## 🔍 '{role}' 역할군이 겪는 현실적인 어려움
+@st.cache_resource
+def get_report_cache():
+    # 프로세스당 하나만 만들어 모든 세션이 공유합니다.
+    report_cache = ReportCache(
+        max_entries=secret("REPORT_CACHE_MAX_ENTRIES", 256),
+        max_bytes=secret("REPORT_CACHE_MAX_BYTES", 2 * 1024 * 1024),
+        ttl_seconds=secret("REPORT_CACHE_TTL_SECONDS", 6 * 60 * 60),
+        store=get_shared_store(),
+    )
+    for stat in ('entries', 'bytes', 'hits', 'misses', 'evictions', 'shared_hits'):
+        metrics.gauge(f'report_cache_{stat}', f"Report cache {stat}", lambda stat=stat: report_cache.stats()[stat])
+    return report_cache
+
+@st.cache_resource
+def get_inflight_reports():
+    return InflightRequests()
+
+@st.cache_resource
+def get_llm_dispatcher():
+    # 모든 세션의 GPT 호출이 이 디스패처 하나를 거칩니다. (동시 요청 수/초당 요청 수/대기열 길이 제한)
+    dispatcher = LLMDispatcher(
+        max_workers=secret("LLM_MAX_WORKERS", 8),
+        rate_per_second=secret("LLM_RATE_PER_SECOND", 5.0),
+        burst=secret("LLM_BURST", 10),
+        max_queue=secret("LLM_MAX_QUEUE", 200),
+        max_attempts=secret("LLM_MAX_ATTEMPTS", 4),
+        breaker=CircuitBreaker(
+            failure_threshold=secret("LLM_BREAKER_FAILURES", 5),
+            cooldown_seconds=secret("LLM_BREAKER_COOLDOWN_SECONDS", 30),
+        ),
+    )
+    metrics.gauge('llm_queue_depth', "LLM requests waiting for a dispatcher worker", dispatcher.queue_depth)
+    metrics.gauge('llm_circuit_open', "1 while the LLM circuit breaker is open", lambda: int(dispatcher.breaker.state == 'open'))
+    return dispatcher
+
+# 페이지 2 상호작용 텔레메트리 (secrets.toml 에서 TELEMETRY_ENABLED = false 로 끌 수 있음)
+TELEMETRY_ENABLED = secret("TELEMETRY_ENABLED", True)
+
+@st.cache_resource
+def get_event_log():
+    # 이벤트는 메모리 버퍼에만 넣고, 파일 쓰기는 백그라운드 스레드가 모아서 합니다.
+    return EventLog(
+        directory=secret("TELEMETRY_DIR", str(DEFAULT_TELEMETRY_DIR)),
+        fmt=secret("TELEMETRY_FORMAT", "parquet"),
+        flush_seconds=secret("TELEMETRY_FLUSH_SECONDS", 2.0),
+        capacity=secret("TELEMETRY_BUFFER_SIZE", 10000),
+        compact_seconds=secret("TELEMETRY_COMPACT_SECONDS", 600),
+        compact_min_files=secret("TELEMETRY_COMPACT_MIN_FILES", 50),
+    )
 
-        {form_data['name']}님이 경험하신 어려움은 비단 개인의 문제만은 아닙니다. '{role}' 역할군이 디지털 환경에서 흔히 겪는 문제들은 다음과 같습니다.
-        * **(어려움 1)**: [첫 번째 어려움을 구체적으로 서술]
-        * **(어려움 2)**: [두 번째 어려움을 구체적으로 서술]
-        * **(어려움 3)**: [세 번째 어려움을 구체적으로 서술]
-        (예: 작은 글씨와 복잡한 UI로 인한 **시각적 피로감**, 전문 용어 사용으로 인한 **정보 이해의 어려움**, 복잡한 인증 절차에 대한 **심리적 불안감** 등)
+@st.cache_resource
+def get_completion_stats():
+    # 역할별 완료 시간 집계. 프로세스 시작 시 텔레메트리 파일에 남은 지난 기록으로 한 번만 채우고,
+    # 이후에는 신청할 때마다 O(1)로 갱신합니다.
+    # 공유 저장소를 쓰면 지난 기록은 저장소에 한 번만 넣고(먼저 시작한 복제본), 조회는 STATS_REFRESH_SECONDS마다 저장소에서 읽습니다.
+    store = get_shared_store()
+    stats = CompletionStats(
+        bin_seconds=secret("STATS_BIN_SECONDS", 10),
+        max_seconds=secret("STATS_MAX_SECONDS", 300),
+        store=store,
+        refresh_seconds=secret("STATS_REFRESH_SECONDS", 5),
+    )
+    if TELEMETRY_ENABLED and (store is None or store.add_if_absent('meta', 'completion_seeded', 1)):
+        stats.load(iter_completions(secret("TELEMETRY_DIR", str(DEFAULT_TELEMETRY_DIR))))
+    return stats
+
+def _import_modules(names):
+    for name in names:
+        try:
+            __import__(name)
+        except ImportError: # 미리 불러오기에 실패해도 실제로 쓸 때 다시 import합니다.
+            pass
+
+@st.cache_resource
+def warm_imports():
+    # 첫 화면을 그린 뒤 프로세스당 한 번, 이후 페이지에서 쓸 무거운 모듈을 백그라운드 스레드에서 미리 import합니다.
+    # (openai 약 0.8초, pyarrow 약 0.2초. 페이지 0은 이것들을 기다리지 않고, 페이지 2/3의 첫 요청도 거의 기다리지 않음)
+    # pandas/plotly.express는 페이지 4에 들어오는 세션만 쓰므로 미리 불러오지 않습니다.
+    names = []
+    if 'openai' in REPORT_BACKENDS and secret("OPENAI_API_KEY"):
+        names.append('openai')
+    if TELEMETRY_ENABLED:
+        names += ['pyarrow.parquet', 'pyarrow.compute']
+    if names:
+        threading.Thread(target=_import_modules, args=(names,), name="warm-imports", daemon=True).start()
 
-        ## 💡 모두를 위한 디지털 세상을 만드는 구체적인 방법
+def set_page(page_index):
+    st.session_state.current_page = page_index
+    persist_session() # 페이지가 바뀔 때마다 저장하므로 재접속하면 이 페이지부터 이어서 진행합니다.
+    st.rerun()
 
-        이러한 디지털 장벽을 허물기 위해 우리는 무엇을 할 수 있을까요? 몇 가지 구체적인 개선 방안을 제안합니다.
-        * **디자인 측면**: [사용자 인터페이스(UI)와 관련된 개선 방안을 구체적으로 제안. 예: '글자 크기 조절 기능 추가', '직관적인 아이콘 사용']
-        * **콘텐츠 측면**: [정보 제공 방식과 관련된 개선 방안을 제안. 예: '쉬운 용어 사용 및 설명 추가', '음성 안내(TTS) 기능 제공']
-        * **사회적 측면**: [교육이나 정책과 관련된 개선 방안을 제안. 예: '찾아가는 디지털 교육 확대', '공공 키오스크에 접근성 가이드라인 의무화']
+@st.cache_resource
+def get_scenarios(spec_path=str(SCENARIO_SPEC_PATH)):
+    # 역할별 신청서 스펙(data/scenarios_v1.json)은 프로세스당 한 번만 읽어 렌더러/검증 함수로 컴파일합니다.
+    return compile_scenarios(load_scenario_specs(spec_path))
 
-        ## ✨ 오늘의 경험이 우리에게 남긴 것
+def start_scenario(scenario):
+    st.session_state.selected_role = scenario.role
+    st.session_state.start_time = time.time()
+    st.session_state.form_values, st.session_state.checkboxes = scenario.new_state()
+    st.session_state.ai_report_content = None
+    st.session_state.ai_report_rendered = None
+    start_form_tracking()
+    record_form_event('form_started')
+    release_speculative_report()
+    set_page(1)
+
+# --- Page 2 Telemetry ---
+def start_form_tracking():
+    st.session_state.participant_id = uuid.uuid4().hex
+    st.session_state.form_tracking = {'last_input_at': time.time(), 'first_input': False, 'error': None}
+
+def record_form_event(event, field=None, duration=None, detail=None):
+    if not TELEMETRY_ENABLED:
+        return
+    get_event_log().record(
+        st.session_state.participant_id, st.session_state.selected_role, event, field=field,
+        elapsed=time.time() - st.session_state.start_time, duration=duration, detail=detail,
+    )
 
-        오늘 {form_data['name']}님이 잠시나마 겪었던 불편함은, 우리 사회가 **'디지털 포용'**으로 나아가기 위해 풀어야 할 중요한 숙제입니다. 이 경험을 통해 나와 다른 입장의 사람들을 한 번 더 생각해볼 수 있는 계기가 되셨기를 바랍니다. 기술의 발전이 **소외가 아닌 연결**을 만드는 데 기여할 수 있도록, {form_data['name']}님의 작은 관심이 큰 변화의 시작이 될 수 있습니다.
-        """
+def track_form_changes(scenario, previous_values, previous_checks, form_error):
+    """이번 프래그먼트 실행에서 바뀐 입력/체크박스와 새로 표시된 오류를 이벤트로 남깁니다."""
+    tracking = st.session_state.form_tracking
+    now = time.time()
+    duration = now - tracking['last_input_at'] # 직전 입력 이후 이번 항목에 쓴 시간
+    changed = False
+    for field_id in scenario.field_ids:
+        if st.session_state.form_values[field_id] != previous_values[field_id]:
+            if not tracking['first_input']:
+                tracking['first_input'] = True
+                record_form_event('first_input', field_id, duration)
+            record_form_event('field_changed', field_id, duration)
+            changed = True
+    for checkbox_id in scenario.checkbox_ids:
+        checked = st.session_state.checkboxes[checkbox_id]
+        if checked != previous_checks[checkbox_id]:
+            record_form_event('checkbox_toggled', checkbox_id, duration, 'on' if checked else 'off')
+            if scenario.is_wrong_toggle(checkbox_id, checked):
+                record_form_event('wrong_checkbox', checkbox_id, duration, 'on' if checked else 'off')
+            changed = True
+    if changed:
+        tracking['last_input_at'] = now
+    if form_error is not None and form_error != tracking['error']:
+        record_form_event('validation_error', detail=form_error)
+    tracking['error'] = form_error
 
-    try:
-        with st.spinner("AI 분석 리포트를 생성 중입니다... 잠시만 기다려 주세요."):
-            response = openai.chat.completions.create(
-                model="gpt-4o", # You can choose other models like "gpt-3.5-turbo" if needed
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant specializing in digital inclusivity and user experience analysis."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800, # Adjust as needed
-                temperature=0.7, # Adjust creativity (0.0-1.0)
-            )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"AI 리포트 생성 중 오류가 발생했습니다: {e}")
-        return "AI 리포트를 불러올 수 없습니다. 오류가 발생했습니다."
+# --- AI Report Generation Function (MODIFIED) ---
+def render_report_html(report_html):
+    # report_html은 report_render로 변환한 HTML 조각입니다. (마크다운을 그대로 넣지 않음)
+    return get_page_renderer().render('report_body', report_content=report_html)
+
+def render_report_document(rendered, time_display):
+    """다운로드용 HTML 파일. 이미 변환해 둔 조각을 감싸기만 하므로 리포트를 다시 만들지 않습니다."""
+    return get_page_renderer().render(
+        'report_document',
+        title="디지털 장벽 체험 리포트",
+        report_html=rendered['html'],
+        footer=f"소요 시간 {time_display} · 리포트 {rendered['hash']}",
+    )
 
+def run_report_request(ticket, backend, role, elapsed_ms, cache_key, report_cache, inflight, metrics):
+    # 디스패처 워커 스레드에서 실행됩니다. Streamlit 요소는 세션 스레드에서만 그릴 수 있으므로
+    # 스트리밍 중에는 지금까지 받은 항목으로 조립한 리포트를 ticket에 쌓아 두고 get_ai_report()가 폴링하며 화면에 표시합니다.
+    # 결과는 여기서 바로 캐시에 넣으므로, 미리 시작한 요청을 아무도 기다리지 않게 되어도 버려지지 않습니다.
+    try:
+        try:
+            report, timing = backend.generate(role, elapsed_ms, on_update=ticket.set_partial_text)
+        except Exception as e:
+            metrics.observe_llm_call(error=e)
+            raise
+        metrics.observe_llm_call(timing)
+        report_cache.put(cache_key, report)
+        return report, timing
+    finally:
+        inflight.discard(cache_key, ticket)
+
+def report_cache_key(role, elapsed_time_seconds):
+    bucket = elapsed_time_bucket(elapsed_time_seconds, REPORT_CACHE_BUCKET_SECONDS)
+    return make_cache_key(role, bucket, PROMPT_VERSION)
+
+def submit_report_request(cache_key, elapsed_ms):
+    """
+    같은 키의 요청이 이미 진행 중이면 그 Ticket에 합류하고, 아니면 원격 백엔드 요청을 디스패처에 새로 제출합니다.
+    대기열이 가득 찼거나 서킷이 열려 있으면 QueueFullError / CircuitOpenError가 그대로 올라갑니다.
+    """
+    role = cache_key[0]
+    backend = get_report_backends().primary
+    report_cache = get_report_cache()
+    inflight = get_inflight_reports()
+    def submit():
+        return get_llm_dispatcher().submit(
+            run_report_request, backend, role, elapsed_ms, cache_key, report_cache, inflight, metrics
+        )
+    return inflight.get_or_submit(cache_key, submit)
+
+def should_shed_remote():
+    """원격 백엔드 대기열이 길어 다음 백엔드(보통 local)로 바로 넘기는 게 나은지"""
+    return bool(
+        get_report_backends().fallback is not None
+        and REPORT_SHED_QUEUE_DEPTH
+        and get_llm_dispatcher().queue_depth() >= REPORT_SHED_QUEUE_DEPTH
+    )
 
-# --- Chart Generation Function ---
-import pandas as pd
-import plotly.express as px
+def fallback_report(role, elapsed_time_seconds, reason):
+    """
+    원격 백엔드를 쓸 수 없을 때 체인의 다음 백엔드로 리포트를 만듭니다.
+    다음 백엔드가 없으면 예전처럼 기본 리포트(DEGRADED_REPORT)를 보여줍니다.
+    """
+    fallback = get_report_backends().fallback
+    if fallback is None:
+        st.warning("지금은 AI 분석을 제공하지 못해 기본 리포트를 보여드립니다.")
+        st.session_state.ai_report_timing = {'degraded': True}
+        return DEGRADED_REPORT
+    report, timing = fallback.generate(role, int(elapsed_time_seconds * 1000))
+    st.session_state.ai_report_timing = dict(timing, fallback=reason)
+    return report
+
+def personalize_report(report):
+    """저장된 리포트 원문의 이름/소요 시간 자리표시자를 채웁니다. 이름은 메모리에만 있으므로 복원된 세션에서는 '참여자'로 씁니다."""
+    name = st.session_state.form_values.get('name') or '참여자'
+    return fill_report_placeholders(report, name, st.session_state.elapsed_time_for_report)
+
+def release_speculative_report():
+    speculative = st.session_state.speculative_report
+    if speculative and speculative['ticket'] is not None:
+        speculative['ticket'].release()
+    st.session_state.speculative_report = None
+
+def start_speculative_report():
+    """
+    폼이 유효해진 시점(페이지 2)에 리포트 생성을 미리 시작합니다.
+    프롬프트는 (역할, 소요 시간 구간)에만 의존하므로, 신청을 누르기 전 소요 시간이 다른 구간으로 넘어가면
+    이전 요청은 release()로 취소(아직 대기 중이면)하고 새 구간으로 다시 시작합니다.
+    이미 실행 중이던 요청은 끝까지 실행되어 캐시에 남으므로 같은 구간의 다른 참여자가 재사용합니다.
+    """
+    if not get_report_backends().primary.remote:
+        return # 로컬 백엔드는 페이지 3에서 바로 만들어도 충분히 빠릅니다.
+    elapsed_time_seconds = time.time() - st.session_state.start_time
+    cache_key = report_cache_key(st.session_state.selected_role, elapsed_time_seconds)
+    speculative = st.session_state.speculative_report
+    if speculative and speculative['key'] == cache_key:
+        return
+    release_speculative_report()
+    if get_report_cache().contains(cache_key) or should_shed_remote():
+        return
+    try:
+        ticket = submit_report_request(cache_key, int(elapsed_time_seconds * 1000))
+    except (QueueFullError, CircuitOpenError):
+        return # 미리 생성은 최선의 노력일 뿐이므로, 실패하면 페이지 3에서 다시 시도합니다.
+    st.session_state.speculative_report = {'key': cache_key, 'ticket': ticket}
 
-def create_digital_divide_charts():
+def get_ai_report(role, form_data, elapsed_time_seconds, placeholder=None):
     """
-    고령층과 외국인의 소통 목적 인터넷 사용 현황에 대한
-    두 개의 파이차트를 생성합니다.
+    {{NAME}} / {{ELAPSED}} 자리표시자가 남은 리포트 원문을 돌려줍니다. (채우기는 personalize_report)
+    form_data의 이름은 스트리밍 중 화면에 보여줄 때만 씁니다.
     """
+    backends = get_report_backends()
+    if not backends.primary.remote:
+        # 로컬 백엔드가 먼저면 캐시/디스패처 없이 세션 스레드에서 바로 만듭니다.
+        report, timing = backends.generate(role, int(elapsed_time_seconds * 1000))
+        st.session_state.ai_report_timing = timing
+        return report
+
+    # 이름/정확한 시간은 자리표시자로 두고 (역할, 시간 구간, 프롬프트 버전)으로 캐시를 먼저 조회합니다.
+    report_cache = get_report_cache()
+    cache_key = report_cache_key(role, elapsed_time_seconds)
+
+    # 다른 구간으로 미리 시작한 요청은 더 이상 필요 없으므로 놓아줍니다. (같은 구간이면 아래에서 합류)
+    speculative = st.session_state.speculative_report
+    if speculative and speculative['key'] != cache_key:
+        release_speculative_report()
+
+    cached_report = report_cache.get(cache_key)
+    if cached_report is not None:
+        release_speculative_report()
+        st.session_state.ai_report_timing = {'ttft': 0.0, 'total': 0.0, 'cached': True}
+        return cached_report
+
+    if should_shed_remote():
+        release_speculative_report()
+        return fallback_report(role, elapsed_time_seconds, 'queue')
+    try:
+        ticket = submit_report_request(cache_key, int(elapsed_time_seconds * 1000))
+    except (QueueFullError, CircuitOpenError):
+        # 백엔드가 실패 중이거나 대기열이 가득 차면 기다리게 하지 않고 다음 백엔드(없으면 기본 리포트)로 넘깁니다.
+        return fallback_report(role, elapsed_time_seconds, 'unavailable')
+    finally:
+        release_speculative_report()
+
+    page_wait_started = time.monotonic()
+    status_slot = st.empty()
+    with st.spinner("AI 분석 리포트를 생성 중입니다... 잠시만 기다려 주세요."):
+        while not ticket.wait(timeout=jittered_poll_interval()):
+            if (REPORT_SHED_SECONDS and backends.fallback is not None
+                    and time.monotonic() - page_wait_started > REPORT_SHED_SECONDS):
+                break
+            position = ticket.queue_position()
+            if ticket.started_at is None:
+                status_slot.caption(f"대기 순번 {position + 1}번 · {ticket.wait_time():.0f}초째 기다리는 중")
+            elif placeholder is not None and ticket.partial_text:
+                status_slot.empty()
+                text = fill_report_placeholders(ticket.partial_text, form_data['name'], elapsed_time_seconds)
+                placeholder.markdown(render_report_html(markdown_to_html(text + " ▌")), unsafe_allow_html=True)
+            elif ticket.attempts > 1:
+                status_slot.caption(f"응답이 지연되어 다시 시도하는 중입니다... ({ticket.attempts}번째 시도)")
+            else:
+                status_slot.empty()
+    status_slot.empty()
+
+    if not ticket.done():
+        # 원격 백엔드가 너무 느립니다. 이미 실행 중이면 끝까지 실행되어 캐시에 남으므로 다음 참여자가 재사용합니다.
+        ticket.release()
+        return fallback_report(role, elapsed_time_seconds, 'slow')
+    if isinstance(ticket.error, CircuitOpenError) or (ticket.error is not None and backends.fallback is not None):
+        return fallback_report(role, elapsed_time_seconds, 'error')
+    if ticket.error is not None:
+        st.error(f"AI 리포트 생성 중 오류가 발생했습니다: {ticket.error}")
+        st.session_state.ai_report_timing = {'failed': True}
+        return "AI 리포트를 불러올 수 없습니다. 오류가 발생했습니다."
 
-    # 1. 고령층 데이터 및 파이차트 생성
-    elderly_data = pd.DataFrame({
-        '사용 빈도': ['사용 안 함', '가끔 사용', '자주 사용', '항상 사용'],
-        '응답자 수': [1475, 231, 193, 39]
-    })
-
-    fig1 = px.pie(
-        elderly_data,
-        values='응답자 수',
-        names='사용 빈도',
-        title='고령층의 소통 목적 인터넷 사용 현황',
-        color_discrete_sequence=px.colors.sequential.Blues_r, # 파란색 계열
-        hole=0.3 # 도넛 모양으로 만들기
+    report, timing = ticket.result
+    st.session_state.ai_report_timing = dict(
+        timing,
+        queue_wait=ticket.wait_time(),
+        page_wait=time.monotonic() - page_wait_started, # 페이지 3에서 실제로 기다린 시간
     )
+    return report
 
-    # fig1 차트 디자인 업데이트
-    fig1.update_traces(
-        textposition='inside',
-        textinfo='percent+label', # 차트 안에 퍼센트와 라벨 표시
-        pull=[0.05, 0, 0, 0] # 가장 큰 조각을 약간 떼어내어 강조
-    )
-    fig1.update_layout(
-        height=400,
-        showlegend=False, # 범례는 숨김 (차트에 라벨이 표시되므로)
-        title_font_size=16,
-        margin=dict(t=50, b=20, l=20, r=20)
-    )
 
-    # 2. 외국인 데이터 및 파이차트 생성
-    foreigner_data = pd.DataFrame({
-        '사용 빈도': ['사용 안 함', '가끔 사용', '자주 사용', '항상 사용'],
-        '응답자 수': [435, 140, 58, 26]
-    })
-
-    fig2 = px.pie(
-        foreigner_data,
-        values='응답자 수',
-        names='사용 빈도',
-        title='외국인의 소통 목적 인터넷 사용 현황',
-        color_discrete_sequence=px.colors.sequential.Reds_r,
-        hole=0.3 # 도넛 모양으로 만들기
-    )
+# --- Chart Generation Function ---
+@st.cache_resource
+def get_digital_divide_charts(survey_path=None):
+    # 그래프는 프로세스당 한 번만 만들고 모든 세션이 같은 Figure 객체를 재사용합니다.
+    # charts(pandas/plotly)는 페이지 4에 처음 들어올 때 import합니다. (페이지 0 첫 화면이 기다리지 않도록)
+    from charts import SURVEY_DATA_PATH, create_digital_divide_charts, load_survey_data
+    return create_digital_divide_charts(load_survey_data(survey_path or SURVEY_DATA_PATH))
+
+# --- Page 2 Form Fragment ---
+@st.fragment
+def application_form():
+    """
+    페이지 2 입력 폼. 입력/체크박스를 바꾸면 이 함수만 다시 실행되고
+    (CSS 주입, API 키 확인, 세션 상태 초기화, 페이지 분기 등) 나머지 스크립트는 다시 실행되지 않습니다.
+    신청 버튼은 set_page(2)의 st.rerun()으로 전체 스크립트를 다시 실행해 페이지 3으로 넘어갑니다.
+    """
+    scenario = get_scenarios()[st.session_state.selected_role]
+    if not st.session_state.form_values:
+        st.session_state.form_values, st.session_state.checkboxes = scenario.new_state()
+    if st.session_state.form_tracking is None:
+        start_form_tracking()
+    previous_values = dict(st.session_state.form_values)
+    previous_checks = dict(st.session_state.checkboxes)
+    with metrics.section('form', '1'): # 프래그먼트 rerun은 rerun_seconds에 잡히지 않으므로 여기서 잽니다.
+        scenario.render(st.session_state.form_values, st.session_state.checkboxes)
+        form_error = scenario.validate(st.session_state.form_values, st.session_state.checkboxes)
+
+    track_form_changes(scenario, previous_values, previous_checks, form_error)
+    form_is_valid = form_error is None
+    if form_is_valid:
+        # 신청 버튼을 누르기 전에 리포트 생성을 미리 시작해 페이지 3의 대기 시간을 줄입니다.
+        start_speculative_report()
+    else:
+        st.error(form_error)
+
+    if st.button('신청', key='submit_form_button', disabled=not form_is_valid):
+        st.session_state.end_time = time.time()
+        # AI 리포트 생성 로직을 Page 3으로 이동시키기 위해, 필요한 시간만 세션 상태에 저장하고 바로 페이지 전환
+        st.session_state.elapsed_time_for_report = st.session_state.end_time - st.session_state.start_time
+        st.session_state.ai_report_content = None # 리포트 내용을 초기화하여 로딩 스피너가 보이게 함
+        st.session_state.ai_report_rendered = None
+        # 다른 참여자들과 비교한 순위는 이번 기록을 넣기 전에 계산해 둡니다.
+        completion_stats = get_completion_stats()
+        st.session_state.completion_rank = completion_stats.slower_than(
+            st.session_state.selected_role, st.session_state.elapsed_time_for_report
+        )
+        completion_stats.record(st.session_state.selected_role, st.session_state.elapsed_time_for_report)
+        record_form_event('form_submitted')
+        set_page(2)
 
-    # fig2 차트 디자인 업데이트
-    fig2.update_traces(
-        textposition='inside',
-        textinfo='percent+label',
-        pull=[0.05, 0, 0, 0]
-    )
-    fig2.update_layout(
-        height=400,
-        showlegend=False,
-        title_font_size=16,
-        margin=dict(t=50, b=20, l=20, r=20)
-    )
 
-    return fig1, fig2
+# --- Admin metrics page (?admin=<ADMIN_TOKEN>) ---
+def render_admin_page():
+    st.title("운영 지표")
+    if not metrics.enabled:
+        st.info("secrets.toml 에 METRICS_ENABLED = true 를 설정하면 계측을 시작합니다.")
+        return
+    st.subheader("페이지별 rerun 시간")
+    st.table([
+        {'page': dict(key)['page'], 'reruns': count, 'mean ms': round(mean * 1000, 1)}
+        for key, (count, mean) in sorted(metrics.rerun_seconds.summary().items())
+    ])
+    st.subheader("구간별 시간")
+    st.table([
+        {'page': dict(key)['page'], 'section': dict(key)['section'], 'count': count, 'mean ms': round(mean * 1000, 1)}
+        for key, (count, mean) in sorted(metrics.section_seconds.summary().items())
+    ])
+    st.subheader("Prometheus")
+    st.code(metrics.render(), language='text')
+
+ADMIN_TOKEN = secret("ADMIN_TOKEN")
+if ADMIN_TOKEN and hmac.compare_digest(st.query_params.get('admin', ''), ADMIN_TOKEN):
+    render_admin_page()
+    st.stop()
 
 # --- Start conditional page rendering ---
 
 
 # Page 1: Start Page
 if st.session_state.current_page == 0:
-    st.markdown('<div class="content-box">', unsafe_allow_html=True)
-    st.markdown('<h1>당신은 누구십니까?</h1>', unsafe_allow_html=True)
-    st.markdown('<p>당신은 해당 역할로 지원금 신청서를 작성합니다.</p>', unsafe_allow_html=True)
+    st.markdown(get_page_renderer().render('start_intro'), unsafe_allow_html=True)
     
-    st.markdown('<div class="button-group">', unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button('75세 김여사', key='elderly_role_button'):
-            st.session_state.selected_role = 'elderly'
-            st.session_state.start_time = time.time()
-            st.session_state.ai_report_content = None
-            set_page(1)
-    with col2:
-        if st.button('외국인 데이비드', key='foreigner_role_button'):
-            st.session_state.selected_role = 'foreigner'
-            st.session_state.start_time = time.time()
-            st.session_state.ai_report_content = None
-            set_page(1)
-            
-    st.markdown('</div>', unsafe_allow_html=True) # button-group 닫기
-    st.markdown('</div>', unsafe_allow_html=True) # content-box 닫기
+    scenarios = get_scenarios()
+    for column, scenario in zip(st.columns(len(scenarios)), scenarios.values()):
+        with column:
+            if st.button(scenario.button_label, key=f'{scenario.role}_role_button'):
+                start_scenario(scenario)
+
 
 
 # Page 2: Application Form
 elif st.session_state.current_page == 1:
-    st.markdown('<div class="page-container page2">', unsafe_allow_html=True)
-    # Add text to the top of Page 2
-    # st.markdown('<p class="page2-top-intro">이 지원금은 디지털 격차 해소를 위해 제공됩니다. 다음 정보를 정확히 입력해 주세요.</p>', unsafe_allow_html=True)
-    st.markdown('<h2>지원금 신청서</h2>', unsafe_allow_html=True)
-    st.markdown('<p>다음 설문 신청 폼을 작성하여 지원금을 신청해주세요.</p>', unsafe_allow_html=True)
-
-    st.markdown('<div class="page2-content">', unsafe_allow_html=True)
-
-    if st.session_state.selected_role == 'elderly':
-        st.markdown('<div class="form-section">', unsafe_allow_html=True)
-        st.markdown('<label for="name_elderly_input_text" class="elderly-label-normal">신청자 성명:</label>', unsafe_allow_html=True)
-        st.session_state.name = st.text_input(
-            label="Hidden Name Label",
-            value=st.session_state.name,
-            key="name_elderly_input",
-            label_visibility="hidden" # This part is important!
-        )
-        st.markdown('<span class="elderly-small-text">(본인임을 증명할 수 있는 정식 한글 성함을 정자체로 기재해 주십시오. 임의 기재 시 신청이 반려될 수 있으며, 이는 전적으로 신청인의 책임으로 귀결됩니다.)</span>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-        st.markdown('<div class="form-section">', unsafe_allow_html=True)
-        st.markdown('<label for="address_elderly_input_text" class="elderly-label-normal">주소지</label>', unsafe_allow_html=True)
-        st.session_state.address = st.text_input(
-            label="Hidden Address Label",
-            value=st.session_state.address,
-            key="address_elderly_input",
-            label_visibility="hidden" # This part is important!
-        )
-        st.markdown('<span class="elderly-small-text">(본 신청서에 기재된 주소지가 실제 주거 상태와 불일치함이 추후 발견될 시, 해당 신청은 별도 통보 없이 자격 상실 처리되며, 지급된 지원금은 관련 법규에 의거하여 환수될 수 있음을 고지합니다.)</span>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-        st.markdown('<div class="form-section">', unsafe_allow_html=True)
-        with st.container():
-            col_chk1, col_txt1 = st.columns([0.05, 0.95])
-            with col_chk1:
-                st.session_state.checkboxes['check1_elderly'] = st.checkbox(
-                    label="",
-                    value=st.session_state.checkboxes['check1_elderly'],
-                    key='check1_elderly_c'
-                )
-            with col_txt1:
-                st.markdown('<label for="check1_elderly_c" class="elderly-tiny-checkbox-label">본인은 본 신청서에 기재한 모든 정보가 본인의 인식과 신념에 기반하여 진실되고 정확하다는 점을 이로써 확인하며, 만일 허위 사실의 기재 또는 사실의 왜곡·은폐 등이 발견될 경우, 본 신청은 즉시 자격이 박탈될 수 있으며, 나아가 대한민국 관련 법령 및 규정에 의거하여 민형사상 책임이 부과될 수 있음을 충분히 인지하고 이에 동의합니다. (필수 확인 사항입니다. 반드시 숙지하시고 체크하시오.)</label>', unsafe_allow_html=True)
-
-        with st.container():
-            col_chk2, col_txt2 = st.columns([0.05, 0.95])
-            with col_chk2:
-                st.session_state.checkboxes['check2_elderly'] = st.checkbox(
-                    label="",
-                    value=st.session_state.checkboxes['check2_elderly'],
-                    key='check2_elderly_c'
-                )
-            with col_txt2:
-                st.markdown('<label for="check2_elderly_c" class="elderly-tiny-checkbox-label">본인은 본 신청서 및 이에 부속된 일체의 제출 서류가 제출과 동시에 주관 기관의 소유로 귀속되며, 어떠한 사유로도 반환되지 아니함을 인지하고 이에 동의하며, 아울러 본 신청의 제출 행위 자체가 해당 프로그램의 공식 운영 지침 및 향후 관계 당국에 의해 고지될 수 있는 모든 수정사항 및 보완 지시에 대하여 구속력을 갖는 준수 의무를 수반하는 법적 효력을 지닌다는 사실을 명확히 인식하고 이에 전적으로 동의합니다. (선택하지 마시오. 선택 시 심사에서 제외될 수 있습니다.)</label>', unsafe_allow_html=True)
-
-        with st.container():
-            col_chk3, col_txt3 = st.columns([0.05, 0.95])
-            with col_chk3:
-                st.session_state.checkboxes['check3_elderly'] = st.checkbox(
-                    label="",
-                    value=st.session_state.checkboxes['check3_elderly'],
-                    key='check3_elderly_c'
-                )
-            with col_txt3:
-                st.markdown('<label for="check3_elderly_c" class="elderly-tiny-checkbox-label">본인은 본 항목에 체크함으로써, 본 디지털 포용 지원 프로그램에 부속된 모든 이용 약관, 세부 조건 및 개인정보 처리 방침을 공식 정부 포털을 통해 열람 가능한 통합 운영 지침에 따라 충분히 숙지하고 이에 명시적으로 동의함을 확인하며, 프로그램 전 기간에 걸쳐 명시된 모든 자격 요건을 지속적으로 충족할 것을 성실히 이행할 법적 및 행정적 책임이 본인에게 있음을 인지하고 이에 전적으로 동의합니다. (필수 확인 사항입니다. 반드시 숙지하시고 체크하시오.)</label>', unsafe_allow_html=True)
-
-        st.markdown('</div>', unsafe_allow_html=True)
-
-    elif st.session_state.selected_role == 'foreigner':
-        st.markdown('<div class="form-section">', unsafe_allow_html=True)
-        st.markdown('<label for="name_foreigner_input_text" class="foreigner-label-normal">Full Name / 성명 (여권 또는 공적 신분증명서상 기재된 사항에 준하여 입력되어야 하며, 제출된 정보와 공식 문서 간의 어떠한 불일치도 신청의 즉각적인 반려 사유가 될 수 있으며, 이에 따라 전 과정을 포함한 재신청 절차가 요구될 수 있습니다.):</label>', unsafe_allow_html=True)
-        st.session_state.name = st.text_input(
-            label="Hidden Foreigner Name Label",
-            value=st.session_state.name,
-            key="name_foreigner_input",
-            label_visibility="hidden" # This part is important!
-        )
-        st.markdown('</div>', unsafe_allow_html=True)
-
-        st.markdown('<div class="form-section">', unsafe_allow_html=True)
-        st.markdown('<label for="address_foreigner_input_text" class="foreigner-label-normal">Residential Address / 거주지 주소 (귀하의 출신 국가에서 통용되는 표준 주소 표기 방식에 준하여, 우편번호를 포함한 현재 실거주지 주소 전체를 정확히 기재해 주시기 바랍니다. 아울러, 향후 주소지 변경이 발생할 경우에는 관계 당국에 지체 없이 이를 통지하여야 하며, 이를 소홀히 할 경우 각종 권익 또는 공식 통지의 수령과 관련하여 예기치 못한 불이익이나 행정적 차질이 발생할 수 있음을 유의하시기 바랍니다.):</label>', unsafe_allow_html=True)
-        st.session_state.address = st.text_input(
-            label="Hidden Foreigner Address Label",
-            value=st.session_state.address,
-            key="address_foreigner_input",
-            label_visibility="hidden" # This part is important!
-        )
-        st.markdown('</div>', unsafe_allow_html=True)
-
-        st.markdown('<div class="form-section">', unsafe_allow_html=True)
-        with st.container():
-            col_chk1, col_txt1 = st.columns([0.05, 0.95])
-            with col_chk1:
-                st.session_state.checkboxes['check1_foreigner'] = st.checkbox(
-                    label="",
-                    value=st.session_state.checkboxes['check1_foreigner'],
-                    key='check1_foreigner_c'
-                )
-            with col_txt1:
-                st.markdown('<label for="check1_foreigner_c" class="foreigner-tiny-checkbox-label">본인은 본 신청서에 기재한 모든 정보가 본인의 인식과 신념에 기반하여 진실되고 정확하다는 점을 이로써 확인하며, 만일 허위 사실의 기재 또는 사실의 왜곡·은폐 등이 발견될 경우, 본 신청은 즉시 자격이 박탈될 수 있으며, 나아가 대한민국 관련 법령 및 규정에 의거하여 민형사상 책임이 부과될 수 있음을 충분히 인지하고 이에 동의합니다. (필수 확인 사항입니다. 반드시 숙지하시고 체크하시오.)</label>', unsafe_allow_html=True)
-
-        with st.container():
-            col_chk2, col_txt2 = st.columns([0.05, 0.95])
-            with col_chk2:
-                st.session_state.checkboxes['check2_foreigner'] = st.checkbox(
-                    label="",
-                    value=st.session_state.checkboxes['check2_foreigner'],
-                    key='check2_foreigner_c'
-                )
-            with col_txt2:
-                st.markdown('<label for="check2_foreigner_c" class="foreigner-tiny-checkbox-label">본인은 본 신청서 및 이에 부속된 일체의 제출 서류가 제출과 동시에 주관 기관의 소유로 귀속되며, 어떠한 사유로도 반환되지 아니함을 인지하고 이에 동의하며, 아울러 본 신청의 제출 행위 자체가 해당 프로그램의 공식 운영 지침 및 향후 관계 당국에 의해 고지될 수 있는 모든 수정사항 및 보완 지시에 대하여 구속력을 갖는 준수 의무를 수반하는 법적 효력을 지닌다는 사실을 명확히 인식하고 이에 전적으로 동의합니다. (선택하지 마시오. 선택 시 심사에서 제외될 수 있습니다.)</label>', unsafe_allow_html=True)
-
-        with st.container():
-            col_chk3, col_txt3 = st.columns([0.05, 0.95])
-            with col_chk3:
-                st.session_state.checkboxes['check3_foreigner'] = st.checkbox(
-                    label="",
-                    value=st.session_state.checkboxes['check3_foreigner'],
-                    key='check3_foreigner_c'
-                )
-            with col_txt3:
-                st.markdown('<label for="check3_foreigner_c" class="foreigner-tiny-checkbox-label">본인은 본 항목에 체크함으로써, 본 디지털 포용 지원 프로그램에 부속된 모든 이용 약관, 세부 조건 및 개인정보 처리 방침을 공식 정부 포털을 통해 열람 가능한 통합 운영 지침에 따라 충분히 숙지하고 이에 명시적으로 동의함을 확인하며, 프로그램 전 기간에 걸쳐 명시된 모든 자격 요건을 지속적으로 충족할 것을 성실히 이행할 법적 및 행정적 책임이 본인에게 있음을 인지하고 이에 전적으로 동의합니다. (필수 확인 사항입니다. 반드시 숙지하시고 체크하시오.)</label>', unsafe_allow_html=True)
-
-        st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown(get_page_renderer().render('form_header'), unsafe_allow_html=True)
 
-    form_is_valid = check_form_validity()
-
-    if not form_is_valid:
-        if not (st.session_state.name.strip() and st.session_state.address.strip()):
-            st.error("성명과 주소지를 모두 입력해야 합니다.")
-        elif (st.session_state.selected_role == 'elderly' and (not st.session_state.checkboxes['check1_elderly'] or not st.session_state.checkboxes['check3_elderly'])) or \
-             (st.session_state.selected_role == 'foreigner' and (not st.session_state.checkboxes['check1_foreigner'] or not st.session_state.checkboxes['check3_foreigner'])):
-            st.error("필수 동의 항목에 체크해야 합니다.")
-        elif (st.session_state.selected_role == 'elderly' and st.session_state.checkboxes['check2_elderly']) or \
-             (st.session_state.selected_role == 'foreigner' and st.session_state.checkboxes['check2_foreigner']):
-            st.error("두 번째 체크박스는 선택하지 마십시오. (선택 시 심사에서 제외될 수 있습니다.)")
-
-    if st.button('신청', key='submit_form_button', disabled=not form_is_valid):
-        st.session_state.end_time = time.time()
-        # AI 리포트 생성 로직을 Page 3으로 이동시키기 위해, 필요한 시간만 세션 상태에 저장하고 바로 페이지 전환
-        st.session_state.elapsed_time_for_report = st.session_state.end_time - st.session_state.start_time
-        st.session_state.ai_report_content = None # 리포트 내용을 초기화하여 로딩 스피너가 보이게 함
-        set_page(2)
-
-    st.markdown('</div>', unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    application_form()
 
 
 # Page 3: AI Analysis Report
 elif st.session_state.current_page == 2:
-    st.markdown('<div class="page-container page3">', unsafe_allow_html=True)
-
     elapsed_time_seconds = 0
     if 'start_time' in st.session_state and 'end_time' in st.session_state:
         elapsed_time_seconds = st.session_state.end_time - st.session_state.start_time
@@ -393,85 +628,115 @@ elif st.session_state.current_page == 2:
     seconds = int(elapsed_time_seconds % 60)
 
     time_display = f"{minutes:02}:{seconds:02}"
-    st.markdown(f'<div class="timer-display" id="elapsedTime">{time_display}</div>', unsafe_allow_html=True)
-
-    st.markdown('<h2>AI 분석 리포트</h2>', unsafe_allow_html=True)
+    st.markdown(get_page_renderer().render('report_header', time_display=time_display), unsafe_allow_html=True)
+    if st.session_state.completion_rank and st.session_state.completion_rank[0] is not None:
+        slower_than, participants = st.session_state.completion_rank
+        st.caption(f"같은 역할을 플레이한 참여자 {participants}명 중 {slower_than:.0f}%보다 오래 걸렸습니다.")
 
     with st.container():
+        report_placeholder = st.empty()
+
         # ai_report_content가 아직 없으면 생성 시작
         if st.session_state.ai_report_content is None:
-             st.session_state.ai_report_content = get_ai_report(
-                st.session_state.selected_role,
-                {'name': st.session_state.name, 'address': st.session_state.address},
-                st.session_state.elapsed_time_for_report # Page 2에서 저장한 시간 사용
-            )
-        
-        # 리포트 내용을 표시
-        report_content = st.session_state.ai_report_content if st.session_state.ai_report_content else '<p>AI 리포트 생성 중...</p>'
+            with metrics.section('ai_report', rerun_page):
+                st.session_state.ai_report_content = get_ai_report(
+                    st.session_state.selected_role,
+                    {'name': '', **st.session_state.form_values},
+                    st.session_state.elapsed_time_for_report, # Page 2에서 저장한 시간 사용
+                    placeholder=report_placeholder
+                )
+            # 생성이 끝났을 때 한 번만 HTML로 변환해 둡니다. 이후 rerun은 변환 없이 같은 조각을 보냅니다.
+            st.session_state.ai_report_rendered = render_report(personalize_report(st.session_state.ai_report_content))
+        elif st.session_state.ai_report_rendered is None:
+            # 복원된 세션: HTML은 저장하지 않으므로 원문에서 한 번 다시 변환합니다.
+            st.session_state.ai_report_rendered = render_report(personalize_report(st.session_state.ai_report_content))
 
-        st.markdown(f"""
-        <div class="ai-report-placeholder-wrapper">
-            {report_content}
-        </div>
-        """, unsafe_allow_html=True)
+        # 리포트 내용을 표시
+        rendered = st.session_state.ai_report_rendered
+        report_html = rendered['html'] if st.session_state.ai_report_content else '<p>AI 리포트 생성 중...</p>'
+
+        report_placeholder.markdown(render_report_html(report_html), unsafe_allow_html=True)
+
+        timing = st.session_state.ai_report_timing
+        if timing and timing.get('cached'):
+            st.caption("저장된 분석 리포트를 바로 불러왔습니다.")
+        elif timing and timing.get('backend') == 'local':
+            st.caption(f"오프라인 분석 엔진으로 만든 리포트입니다. (생성 {timing['total'] * 1000:.1f}ms)")
+        elif timing and not timing.get('degraded') and not timing.get('failed'):
+            st.caption(
+                f"대기 {timing['queue_wait']:.2f}초 · 첫 응답까지 {timing['ttft']:.2f}초 · 전체 생성 {timing['total']:.2f}초"
+                f" · 이 화면에서 기다린 시간 {timing['page_wait']:.2f}초"
+            )
+        # 오류 안내나 기본 리포트(degraded)가 아닌, 실제로 만든 리포트만 저장할 수 있습니다.
+        if st.session_state.ai_report_content and timing and not timing.get('degraded') and not timing.get('failed'):
+            st.download_button(
+                "리포트 저장하기",
+                data=render_report_document(rendered, time_display),
+                file_name=f"digital_barrier_report_{rendered['hash']}.html",
+                mime='text/html',
+                key='report_download_button',
+                on_click='ignore', # 저장해도 rerun하지 않음
+            )
         
     if st.button('마지막 결과 보기', key='final_result_button'):
         set_page(3)
 
-    st.markdown('</div>', unsafe_allow_html=True)
-
 
 # Page 4: Digital Divide Status
 elif st.session_state.current_page == 3:
-    st.markdown('<div class="page-container page4">', unsafe_allow_html=True)
-
-    # 1. Apply light blue box to text and descriptive paragraph
-    with st.container(): # Utilize st.container() as explained before
-        # Combine all text into a single string to put inside the new box.
-        combined_description = """
-        <p class="solution-text">이 짧은 경험을 통해 느꼈듯이, 디지털 격차는 누군가에게는 <strong>거대한 장벽</strong>일 수 있음을 기억해야 합니다.</p>
-        <p class="solution-text">밑의 그래프는 오늘 알아본 노인층과 외국인 층의 디지털 사용 현황입니다. 이를 통해, 아직 수많은 사람들이 디지털 사용이라는 장벽에 막혀 있음을 알 수 있죠. </p>
-        <p class="solution-text">진정한 디지털 포용은 단순히 기술의 제공을 넘어, 모든 이가 소외되지 않고, 소통하며 성장할 수 있는 환경에서 시작됩니다. <strong>관심과 배려</strong>로 디지털 세상의 문턱을 낮춰나갈 때, 비로소 모두를 위한 따뜻한 연결을 이룰 수 있습니다.</p>
-        """
-        # Combine HTML tags and content into a single markdown string.
-        st.markdown(f"""
-        <div class="section-description-box">
-            {combined_description}
-        </div>
-        """, unsafe_allow_html=True)
-
-    # 2. Add <현황 그래프> title above the charts (h2 size)
-    st.markdown('<h3 class="section-title">현황 그래프</h3>', unsafe_allow_html=True) # Add new class
-
-    # Keep chart container
-    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    
-    fig1, fig2 = create_digital_divide_charts() # Keep existing function call
-    col_chart1, col_chart2 = st.columns(2)
-    
-    with col_chart1:
-        st.plotly_chart(fig1, use_container_width=True)
-    with col_chart2:
-        st.plotly_chart(fig2, use_container_width=True)
+    # 1. 설명 박스 + <현황 그래프> 제목 (templates/status_intro.html)
+    st.markdown(get_page_renderer().render('status_intro'), unsafe_allow_html=True)
+
+    with metrics.section('survey_charts', rerun_page):
+        fig1, fig2 = get_digital_divide_charts() # 프로세스당 한 번만 생성된 그래프 재사용
+        col_chart1, col_chart2 = st.columns(2)
+
+        with col_chart1:
+            st.plotly_chart(fig1, use_container_width=True)
+        with col_chart2:
+            st.plotly_chart(fig2, use_container_width=True)
+
+    # 지금까지 이 역할을 플레이한 참여자들의 소요 시간 분포 (신청할 때마다 갱신되는 집계에서 바로 읽음)
+    role = st.session_state.selected_role
+    completion_stats = get_completion_stats()
+    summary = completion_stats.summary(role) if role else None
+    if summary:
+        elapsed_time_seconds = st.session_state.get('elapsed_time_for_report')
+        highlight = completion_stats.bin_label(elapsed_time_seconds) if elapsed_time_seconds is not None else None
+        title = f"'{get_scenarios()[role].button_label}' 참여자 소요 시간 분포 (실시간)"
+        with metrics.section('completion_chart', rerun_page):
+            from charts import create_completion_time_chart
+            st.plotly_chart(create_completion_time_chart(summary, title, highlight), use_container_width=True)
+        st.caption(
+            f"참여자 {summary['count']}명 · 평균 {summary['mean']:.0f}초 · 중앙값 {summary['median']:.0f}초"
+            f" · 90%가 {summary['p90']:.0f}초 안에 완료"
+        )
+        if st.session_state.completion_rank and st.session_state.completion_rank[0] is not None:
+            st.caption(f"빨간 막대가 내 기록이 속한 구간입니다. (같은 역할 참여자의 {st.session_state.completion_rank[0]:.0f}%보다 오래 걸림)")
 
-    st.markdown('</div>', unsafe_allow_html=True)
-    st.markdown('<h3>\"디지털 포용. 그것은 관심과 배려에서 시작됩니다.\"</h3>', unsafe_allow_html=True)
+    st.markdown(get_page_renderer().render('status_footer'), unsafe_allow_html=True)
 
-    st.markdown('<div style="margin-top: 30px;">', unsafe_allow_html=True)
     if st.button("처음으로 돌아가기", key="restart_button_page4"):
         st.session_state.current_page = 0
         st.session_state.selected_role = ''
         st.session_state.start_time = 0
         st.session_state.end_time = 0
-        st.session_state.name = ''
-        st.session_state.address = ''
-        st.session_state.checkboxes = {
-            'check1_elderly': False, 'check2_elderly': False, 'check3_elderly': False,
-            'check1_foreigner': False, 'check2_foreigner': False, 'check3_foreigner': False,
-        }
+        st.session_state.form_values = {}
+        st.session_state.checkboxes = {}
+        st.session_state.form_tracking = None
+        st.session_state.completion_rank = None
         st.session_state.ai_report_content = None
+        st.session_state.ai_report_rendered = None
+        st.session_state.ai_report_timing = None
+        release_speculative_report()
+        forget_session()
         # Check if set_page function exists, then call it
         if 'set_page' in globals():
             set_page(0)
-    st.markdown('</div>', unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+
+persist_session() # 페이지 3에서 생성한 리포트 등, 페이지 전환 없이 바뀐 상태도 저장
+warm_imports()
+if render_stats is not None:
+    st.session_state.render_stats = render_stats.as_dict()
+# 페이지 전환(st.rerun)으로 중간에 끝난 rerun은 여기까지 오지 않으므로 집계되지 않습니다.
+metrics.observe_rerun(rerun_page, time.perf_counter() - rerun_started)
@@ -0,0 +1,190 @@
+"""
+워크숍 참여자 전체의 분석 리포트를 한 번에 만드는 배치 CLI.
+
+참여자 결과 파일(CSV 또는 Parquet)을 읽어 페이지 3과 같은 프롬프트/백엔드로 리포트를 만들고
+결과를 JSONL 파일에 한 줄씩 씁니다. 열 이름:
+    participant_id (없으면 행 번호), role, name, elapsed_seconds
+
+- 같은 (역할, 소요 시간 구간)의 참여자는 앱과 마찬가지로 생성 한 번을 공유하고 이름/시간만 따로 채웁니다.
+- 원격 요청은 앱과 같은 LLMDispatcher로 보냅니다. 동시 요청 수(--concurrency), 초당 요청 수, 재시도, 서킷 브레이커가 적용됩니다.
+- 원격 백엔드가 끝내 실패한 구간은 --backends의 다음 백엔드(예: local)로 만듭니다.
+- 출력 파일이 체크포인트입니다. 완료된 구간마다 바로 써 두므로, 중간에 멈췄다면 같은 명령을 다시 실행하면
+  이미 출력 파일에 있는 참여자는 건너뛰고 나머지만 만듭니다.
+
+사용법:
+    python stub_openai_server.py --port 8000 --latency 0.5 &
+    python batch_reports.py participants.csv --output reports.jsonl \\
+        --base-url http://127.0.0.1:8000/v1/ --api-key sk-local-stub --concurrency 8
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from ai_report import PROMPT_VERSION, elapsed_time_bucket, fill_report_placeholders
+from llm_dispatcher import CircuitBreaker, LLMDispatcher, jittered_poll_interval
+from report_backends import make_report_backends
+from report_cache import make_cache_key
+from scenarios import load_scenario_specs, role_labels
+
+
+def read_participants(path):
+    """CSV/Parquet 파일을 {participant_id, role, name, elapsed_seconds} dict 목록으로 읽습니다."""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        rows = pq.read_table(path).to_pylist()
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    participants = []
+    for index, row in enumerate(rows):
+        try:
+            participants.append({
+                'participant_id': str(row.get('participant_id') or index),
+                'role': row['role'],
+                'name': row.get('name') or '',
+                'elapsed_seconds': float(row['elapsed_seconds']),
+            })
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{path}: row {index + 1} is missing role/elapsed_seconds ({e})") from e
+    return participants
+
+
+def read_checkpoint(path):
+    """이미 출력 파일에 쓰인 참여자 id 집합. (마지막 줄이 쓰다 만 줄이면 무시)"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['participant_id'])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def group_by_cache_key(participants, bucket_seconds):
+    groups = {}
+    for participant in participants:
+        bucket = elapsed_time_bucket(participant['elapsed_seconds'], bucket_seconds)
+        groups.setdefault(make_cache_key(participant['role'], bucket, PROMPT_VERSION), []).append(participant)
+    return groups
+
+
+def run_remote(ticket, backend, role, elapsed_ms):
+    return backend.generate(role, elapsed_ms)
+
+
+def write_group(out, group, report, timing):
+    for participant in group:
+        out.write(json.dumps(dict(
+            participant,
+            report=fill_report_placeholders(report, participant['name'], participant['elapsed_seconds']),
+            backend=timing.get('backend'),
+            generation_seconds=timing.get('total'),
+            shared=len(group),
+        ), ensure_ascii=False) + '\n')
+    out.flush()
+
+
+def generate_all(groups, backends, out, args):
+    """구간별로 리포트를 만들어 out에 씁니다. 반환값: (사용한 백엔드별 구간 수, 실패한 참여자 수)"""
+    used = {}
+    failed = 0
+    primary, fallback = backends.primary, backends.fallback
+
+    def finish(group, report, timing):
+        used[timing['backend']] = used.get(timing['backend'], 0) + 1
+        write_group(out, group, report, timing)
+
+    def run_fallback(group, error):
+        nonlocal failed
+        if fallback is None:
+            print(f"  failed: {group[0]['role']} ({len(group)} participants): {error!r}", file=sys.stderr)
+            failed += len(group)
+            return
+        finish(group, *fallback.generate(group[0]['role'], int(group[0]['elapsed_seconds'] * 1000)))
+
+    if not primary.remote:
+        for group in groups.values():
+            try:
+                finish(group, *backends.generate(group[0]['role'], int(group[0]['elapsed_seconds'] * 1000)))
+            except Exception as e:
+                print(f"  failed: {group[0]['role']} ({len(group)} participants): {e!r}", file=sys.stderr)
+                failed += len(group)
+        return used, failed
+
+    dispatcher = LLMDispatcher(
+        max_workers=args.concurrency,
+        rate_per_second=args.rate,
+        burst=args.concurrency,
+        max_queue=len(groups) + 1, # 모든 구간을 한 번에 넣고, 동시 실행 수는 max_workers로 제한
+        max_attempts=args.max_attempts,
+        breaker=CircuitBreaker(failure_threshold=args.concurrency, cooldown_seconds=10),
+    )
+    pending = []
+    for group in groups.values():
+        ticket = dispatcher.submit(run_remote, primary, group[0]['role'], int(group[0]['elapsed_seconds'] * 1000))
+        pending.append((group, ticket))
+    # 끝난 순서대로 바로 써 두어야 중간에 멈춰도 다시 만들 구간이 적습니다.
+    while pending:
+        still_running = []
+        for group, ticket in pending:
+            if not ticket.done():
+                still_running.append((group, ticket))
+            elif ticket.error is not None:
+                run_fallback(group, ticket.error)
+            else:
+                report, timing = ticket.result
+                finish(group, report, dict(timing, backend=primary.name))
+        pending = still_running
+        if pending:
+            time.sleep(jittered_poll_interval())
+    return used, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="참여자 결과 파일 (.csv 또는 .parquet)")
+    parser.add_argument('--output', default='reports.jsonl', help="결과 JSONL 파일 (체크포인트 겸용, 있으면 이어서 생성)")
+    parser.add_argument('--backends', default='openai,local', help="쉼표로 구분한 백엔드 순서 (앱의 REPORT_BACKENDS와 같음)")
+    parser.add_argument('--api-key', default=os.environ.get('OPENAI_API_KEY'), help="기본값: 환경 변수 OPENAI_API_KEY")
+    parser.add_argument('--base-url', default=os.environ.get('OPENAI_BASE_URL'), help="OpenAI 호환 서버 주소 (로컬 stub 등)")
+    parser.add_argument('--concurrency', type=int, default=8, help="동시에 보내는 최대 요청 수")
+    parser.add_argument('--rate', type=float, default=5.0, help="초당 최대 요청 수")
+    parser.add_argument('--max-attempts', type=int, default=4, help="요청 하나당 최대 시도 횟수 (일시적 오류만 재시도)")
+    parser.add_argument('--bucket-seconds', type=int, default=10, help="리포트를 공유하는 소요 시간 구간 폭(초). 앱과 같게 두세요")
+    args = parser.parse_args()
+
+    participants = read_participants(args.input)
+    done = read_checkpoint(args.output)
+    todo = [p for p in participants if p['participant_id'] not in done]
+    groups = group_by_cache_key(todo, args.bucket_seconds)
+    backends = make_report_backends(
+        args.backends.split(','), openai_api_key=args.api_key, openai_base_url=args.base_url,
+        bucket_seconds=args.bucket_seconds, streaming=False, role_labels=role_labels(load_scenario_specs()),
+    )
+    print(f"{len(participants)} participants, {len(done)} already in {args.output}, "
+          f"{len(todo)} to generate in {len(groups)} report(s) via {' -> '.join(backends.names)}")
+
+    started = time.perf_counter()
+    with open(args.output, 'a', encoding='utf-8') as out:
+        used, failed = generate_all(groups, backends, out, args)
+    wall = time.perf_counter() - started
+
+    written = len(todo) - failed
+    print(f"wrote {written} reports in {wall:.1f} s "
+          f"({written / wall * 60 if wall else 0:.0f} reports/min, {sum(used.values()) / wall * 60 if wall else 0:.0f} generations/min)")
+    print("generations by backend: " + (', '.join(f"{name} {count}" for name, count in used.items()) or '-'))
+    if failed:
+        print(f"{failed} participants failed; run the same command again to retry them.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
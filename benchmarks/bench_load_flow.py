@@ -0,0 +1,264 @@
+"""
+app.py 인스턴스 하나가 동시 참여자를 얼마나 감당하는지 측정하는 부하 테스트.
+
+실제 `streamlit run` 서버를 띄우고 N개의 웹소켓 세션이 동시에 전체 흐름을 진행합니다:
+    페이지 1 접속 -> 역할 선택 -> 페이지 2 입력 (성명, 주소, 체크박스) -> 신청 (페이지 3 리포트 생성) -> 페이지 4
+GPT 대신 같은 프로세스에서 띄운 stub 서버(stub_openai_server.py)를 쓰며, 지연/오류율을 옵션으로 조절합니다.
+
+결과:
+    - 단계별 rerun 지연 시간 분위수 (p50/p90/p99/max)
+    - 서버 RSS 최대값과 세션당 증가량
+    - 페이지 3에 표시된 LLM 대기열 대기 시간, 캐시 적중/기본 리포트 수
+    - 전체 처리량 (완료한 흐름/분), stub이 받은 LLM 요청 수
+결과는 --output 파일에 JSON 한 줄씩 덧붙이므로(커밋 해시 포함) 커밋 간 회귀를 비교할 수 있습니다.
+
+사용법:
+    python benchmarks/bench_load_flow.py --sessions 20 --latency 1.0 --token-delay 0.01
+    python benchmarks/bench_load_flow.py --sessions 50 --bucket-seconds 0.001   # 리포트 캐시 없이 세션마다 LLM 호출
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scenarios import load_scenario_specs
+from stub_openai_server import make_server
+from ws_session import StreamlitSession, process_cpu_seconds, process_rss_bytes, start_streamlit_server
+
+DEFAULT_OUTPUT = os.path.join(ROOT, 'benchmarks', 'results', 'load_flow.jsonl')
+
+# 페이지 3 캡션: "대기 0.00초 · 첫 응답까지 0.53초 · 전체 생성 0.72초 · 이 화면에서 기다린 시간 0.59초"
+TIMING_CAPTION = re.compile(r"대기 ([\d.]+)초 · 첫 응답까지 ([\d.]+)초 · 전체 생성 ([\d.]+)초 · 이 화면에서 기다린 시간 ([\d.]+)초")
+CACHED_CAPTION = "저장된 분석 리포트를 바로 불러왔습니다."
+DEGRADED_WARNINGS = ("기본 리포트를 보여드립니다",)
+LOCAL_CAPTION = "오프라인 분석 엔진으로 만든 리포트입니다."
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    def pick(q):
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {
+        'count': len(ordered),
+        'p50': pick(0.50),
+        'p90': pick(0.90),
+        'p99': pick(0.99),
+        'max': ordered[-1],
+        'mean': sum(ordered) / len(ordered),
+    }
+
+
+class RssSampler:
+    """서버 프로세스의 RSS를 주기적으로 읽어 최대값을 기록합니다."""
+
+    def __init__(self, pid, interval=0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = process_rss_bytes(pid)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = process_rss_bytes(self.pid)
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+
+async def run_flow(port, role, think_time, step_timeout, latencies, page3):
+    """참여자 한 명의 전체 흐름. 단계별 rerun 지연(ms)을 latencies에, 페이지 3 결과를 page3에 넣습니다."""
+    async def step(name, coro):
+        result = await asyncio.wait_for(coro, step_timeout)
+        latencies.setdefault(name, []).append(result.latency * 1000)
+        if think_time:
+            await asyncio.sleep(think_time * random.uniform(0.5, 1.5)) # 사람이 읽고 입력하는 시간
+        return result
+
+    session = StreamlitSession(port)
+    try:
+        await step('page1_load', session.connect())
+        await step('role_select', session.click(f'{role}_role_button'))
+        await step('form_input', session.set_text(f'name_{role}_input', '홍길동'))
+        await step('form_input', session.set_text(f'address_{role}_input', '서울특별시 종로구 세종대로 1'))
+        await step('form_input', session.set_checkbox(f'check1_{role}_c', True))
+        await step('form_input', session.set_checkbox(f'check3_{role}_c', True))
+        await step('submit_and_report', session.click('submit_form_button'))
+        page3.append(parse_page3(session.texts))
+        await step('page4', session.click('final_result_button'))
+        if not session.has_widget('restart_button_page4'):
+            raise RuntimeError("page 4 was not reached")
+    finally:
+        session.close()
+
+
+def parse_page3(texts):
+    result = {'cached': False, 'degraded': False, 'local': False, 'queue_wait': None, 'ttft': None, 'total': None, 'page_wait': None}
+    for text in texts:
+        match = TIMING_CAPTION.search(text)
+        if match:
+            result.update(zip(('queue_wait', 'ttft', 'total', 'page_wait'), map(float, match.groups())))
+        elif text == CACHED_CAPTION:
+            result['cached'] = True
+        elif text.startswith(LOCAL_CAPTION):
+            result['local'] = True
+        elif any(warning in text for warning in DEGRADED_WARNINGS):
+            result['degraded'] = True
+    return result
+
+
+async def run_load(port, args, roles):
+    latencies, page3, errors = {}, [], []
+
+    async def participant(i):
+        role = roles[i % len(roles)]
+        await asyncio.sleep(args.ramp_up * i / max(args.sessions, 1)) # 접속 시점을 ramp_up초 동안 고르게 분산
+        try:
+            await run_flow(port, role, args.think_time, args.step_timeout, latencies, page3)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(participant(i) for i in range(args.sessions)))
+    return latencies, page3, errors, time.perf_counter() - started
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    all_roles = [spec['role'] for spec in load_scenario_specs()['scenarios']]
+    parser = argparse.ArgumentParser(description="4페이지 전체 흐름 동시 세션 부하 테스트")
+    parser.add_argument('--app', default=os.path.join(ROOT, 'app.py'))
+    parser.add_argument('--sessions', type=int, default=20, help="동시에 진행하는 참여자 수")
+    parser.add_argument('--role', default='mixed', choices=['mixed', *all_roles], help="mixed면 역할을 번갈아 선택")
+    parser.add_argument('--think-time', type=float, default=0.3, help="단계 사이 평균 대기 시간(초)")
+    parser.add_argument('--ramp-up', type=float, default=2.0, help="모든 세션이 접속을 시작하기까지 걸리는 시간(초)")
+    parser.add_argument('--step-timeout', type=float, default=120.0, help="단계 하나의 최대 대기 시간(초)")
+    parser.add_argument('--latency', type=float, default=0.5, help="stub: 첫 응답 전 대기 시간(초)")
+    parser.add_argument('--token-delay', type=float, default=0.005, help="stub: 스트리밍 청크 사이 대기 시간(초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="stub: 500 오류 확률 (0.0-1.0)")
+    parser.add_argument('--bucket-seconds', type=float, default=None,
+                        help="REPORT_CACHE_BUCKET_SECONDS (아주 작게 주면 세션마다 LLM을 호출)")
+    parser.add_argument('--no-streaming', action='store_true', help="REPORT_STREAMING = false")
+    parser.add_argument('--backends', default='openai,local', help="REPORT_BACKENDS (쉼표로 구분, 예: openai / local / openai,local)")
+    parser.add_argument('--shed-seconds', type=float, default=None, help="REPORT_SHED_SECONDS (0이면 느려도 넘기지 않음)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="결과를 JSON 한 줄로 덧붙일 파일")
+    args = parser.parse_args()
+    roles = all_roles if args.role == 'mixed' else [args.role]
+
+    stub = make_server(port=0, latency=args.latency, token_delay=args.token_delay, error_rate=args.error_rate)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets_path = os.path.join(tmp, 'secrets.toml')
+        with open(secrets_path, 'w', encoding='utf-8') as f:
+            f.write('OPENAI_API_KEY = "sk-benchmark"\n')
+            f.write(f'OPENAI_BASE_URL = "http://127.0.0.1:{stub.server_address[1]}/v1/"\n')
+            f.write(f'TELEMETRY_DIR = "{os.path.join(tmp, "telemetry")}"\n')
+            f.write(f'SESSION_DB = "{os.path.join(tmp, "sessions.sqlite3")}"\n')
+            f.write(f'REPORT_STREAMING = {"false" if args.no_streaming else "true"}\n')
+            f.write(f'REPORT_BACKENDS = {json.dumps(args.backends.split(","))}\n')
+            if args.shed_seconds is not None:
+                f.write(f'REPORT_SHED_SECONDS = {args.shed_seconds}\n')
+            if args.bucket_seconds is not None:
+                f.write(f'REPORT_CACHE_BUCKET_SECONDS = {args.bucket_seconds}\n')
+
+        server, port = start_streamlit_server(args.app, secrets_path)
+        try:
+            # 첫 실행(임포트, 캐시 채우기)은 측정에서 제외
+            asyncio.run(run_flow(port, roles[0], 0, args.step_timeout, {}, []))
+            stub_requests_before = dict(stub.RequestHandlerClass.stats)
+            rss_baseline = process_rss_bytes(server.pid)
+            cpu_before = process_cpu_seconds(server.pid)
+            with RssSampler(server.pid) as rss:
+                latencies, page3, errors, wall = asyncio.run(run_load(port, args, roles))
+            cpu_after = process_cpu_seconds(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+    stub.shutdown()
+
+    completed = args.sessions - len(errors)
+    queue_waits = [p['queue_wait'] for p in page3 if p['queue_wait'] is not None]
+    page_waits = [p['page_wait'] for p in page3 if p['page_wait'] is not None]
+    stub_stats = stub.RequestHandlerClass.stats
+    result = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'params': {k: v for k, v in vars(args).items() if k not in ('app', 'output')},
+        'sessions': args.sessions,
+        'completed': completed,
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'wall_seconds': wall,
+        'throughput_flows_per_minute': completed / wall * 60 if wall else None,
+        'rerun_latency_ms': {name: percentiles(values) for name, values in latencies.items()},
+        'rss': {
+            'baseline_bytes': rss_baseline,
+            'peak_bytes': rss.peak,
+            'peak_per_session_bytes': (rss.peak - rss_baseline) / args.sessions if rss.peak and rss_baseline else None,
+        },
+        'server_cpu_seconds': cpu_after - cpu_before if cpu_before is not None else None,
+        'report': {
+            'cached': sum(p['cached'] for p in page3),
+            'degraded': sum(p['degraded'] for p in page3),
+            'local': sum(p['local'] for p in page3),
+            'llm_requests': stub_stats['requests'] - stub_requests_before['requests'],
+            'llm_injected_errors': stub_stats['errors'] - stub_requests_before['errors'],
+            'queue_wait_s': percentiles(queue_waits),
+            'page3_wait_s': percentiles(page_waits),
+        },
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result, ensure_ascii=False) + '\n')
+    print_summary(result, args.output)
+
+
+def print_summary(result, output):
+    print(f"sessions: {result['sessions']}  completed: {result['completed']}  errors: {result['errors']}")
+    print(f"wall: {result['wall_seconds']:.1f} s  throughput: {result['throughput_flows_per_minute']:.1f} flows/min")
+    print(f"{'step':<20}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, p in result['rerun_latency_ms'].items():
+        print(f"{name:<20}{p['count']:>7}{p['p50']:>10.1f}{p['p90']:>10.1f}{p['p99']:>10.1f}{p['max']:>10.1f}")
+    rss = result['rss']
+    if rss['peak_bytes']:
+        print(f"peak RSS: {rss['peak_bytes'] / 2**20:.1f} MiB  (+{(rss['peak_per_session_bytes'] or 0) / 2**20:.2f} MiB/session)")
+    report = result['report']
+    print(f"LLM requests: {report['llm_requests']}  cached: {report['cached']}  degraded: {report['degraded']}  local: {report['local']}")
+    if report['queue_wait_s']:
+        q = report['queue_wait_s']
+        print(f"LLM queue wait: p50 {q['p50']:.2f} s  p90 {q['p90']:.2f} s  max {q['max']:.2f} s")
+    for error in result['error_samples']:
+        print(f"  error: {error}")
+    print(f"results appended to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+페이지 2 신청서를 한 번 완성할 때까지의 rerun 수와 서버 CPU 시간을 측정합니다.
+
+실제 `streamlit run` 서버를 띄우고 웹소켓으로 붙어서(브라우저와 같은 프로토콜) 다음을 수행합니다:
+    역할 선택 -> 성명 입력 -> 주소 입력 -> 1번 체크 -> 2번 체크(실수) -> 2번 해제 -> 3번 체크 -> 신청
+서버 CPU는 성명 입력부터 마지막 체크까지의 입력 6번에 대해 측정합니다.
+각 입력이 전체 스크립트 rerun인지, 프래그먼트 rerun인지는 서버가 보내는 script_finished 상태로 구분합니다.
+
+이전 버전과 비교하려면 예전 커밋을 별도 폴더에 꺼내서 --app 으로 지정하면 됩니다:
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_page2_form.py --app /tmp/before/app.py
+    python benchmarks/bench_page2_form.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scenarios import load_scenario_specs
+from stub_openai_server import make_server
+from ws_session import StreamlitSession, process_cpu_seconds, start_streamlit_server
+
+
+async def fill_form(port, pid, role):
+    session = StreamlitSession(port)
+    await session.connect()
+    await session.click(f'{role}_role_button')
+
+    steps = [
+        ('text', f'name_{role}_input', '홍길동'),
+        ('text', f'address_{role}_input', '서울특별시 종로구 세종대로 1'),
+        ('check', f'check1_{role}_c', True),
+        ('check', f'check2_{role}_c', True), # 하지 말라는 체크박스를 실수로 선택
+        ('check', f'check2_{role}_c', False),
+        ('check', f'check3_{role}_c', True),
+    ]
+    totals = {'runs': 0, 'fragment_runs': 0, 'deltas': 0, 'latencies': []}
+    cpu_before = process_cpu_seconds(pid)
+    for kind, key, value in steps:
+        if kind == 'text':
+            result = await session.set_text(key, value)
+        else:
+            result = await session.set_checkbox(key, value)
+        totals['runs'] += result.runs
+        totals['fragment_runs'] += result.fragment_runs
+        totals['deltas'] += result.deltas
+        totals['latencies'].append(result.latency * 1000)
+    cpu_after = process_cpu_seconds(pid)
+    totals['cpu_ms'] = (cpu_after - cpu_before) * 1000 if cpu_before is not None else None
+
+    result = await session.click('submit_form_button')
+    totals['submit_runs'] = result.runs + result.fragment_runs
+    session.close()
+    return totals
+
+
+async def run_benchmark(port, pid, forms, role):
+    await fill_form(port, pid, role) # 첫 실행(임포트, 캐시 채우기)은 측정에서 제외
+    return [await fill_form(port, pid, role) for _ in range(forms)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="페이지 2 신청서 완성당 rerun 수 / 서버 CPU 측정")
+    parser.add_argument('--app', default=os.path.join(ROOT, 'app.py'))
+    parser.add_argument('--forms', type=int, default=10, help="측정할 신청서 작성 횟수")
+    parser.add_argument('--role', default='elderly', choices=[spec['role'] for spec in load_scenario_specs()['scenarios']])
+    args = parser.parse_args()
+
+    stub = make_server(port=0)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets_path = os.path.join(tmp, 'secrets.toml')
+        with open(secrets_path, 'w', encoding='utf-8') as f:
+            f.write('OPENAI_API_KEY = "sk-benchmark"\n')
+            f.write(f'OPENAI_BASE_URL = "http://127.0.0.1:{stub.server_address[1]}/v1/"\n')
+            f.write(f'TELEMETRY_DIR = "{os.path.join(tmp, "telemetry")}"\n')
+            f.write(f'SESSION_DB = "{os.path.join(tmp, "sessions.sqlite3")}"\n')
+
+        server, port = start_streamlit_server(args.app, secrets_path)
+        try:
+            results = asyncio.run(run_benchmark(port, server.pid, args.forms, args.role))
+        finally:
+            server.terminate()
+            server.wait()
+    stub.shutdown()
+
+    latencies = [ms for r in results for ms in r['latencies']]
+    print(f"app: {args.app}")
+    print(f"forms measured:              {len(results)}")
+    print(f"full reruns per form:        {statistics.mean(r['runs'] for r in results):.1f}  (+ 신청 {results[0]['submit_runs']}회)")
+    print(f"fragment reruns per form:    {statistics.mean(r['fragment_runs'] for r in results):.1f}")
+    print(f"deltas per form:             {statistics.mean(r['deltas'] for r in results):.1f}")
+    print(f"input rerun latency (mean):  {statistics.mean(latencies):.1f} ms")
+    cpu = [r['cpu_ms'] for r in results if r['cpu_ms'] is not None]
+    if cpu:
+        print(f"server CPU per form (mean):  {statistics.mean(cpu):.1f} ms  (성명 입력 ~ 마지막 체크까지)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+페이지 4 그래프의 재실행(rerun)당 비용을 캐시 적용 전/후로 비교합니다.
+
+  - before: 매 rerun마다 DataFrame과 Figure를 새로 만들고 st.plotly_chart가 직렬화 (기존 방식)
+  - after : 프로세스당 한 번 만든 Figure를 재사용하고 직렬화만 수행 (get_digital_divide_charts)
+  - page 4 rerun: AppTest로 실제 app.py의 페이지 4를 반복 실행한 전체 시간
+
+사용법:
+    python benchmarks/bench_page4_charts.py --runs 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import plotly.io
+import plotly.tools
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from charts import create_digital_divide_charts, load_survey_data
+
+
+def serialize_like_streamlit(fig):
+    # st.plotly_chart 내부와 같은 순서: 검증된 Figure로 변환 후 JSON 직렬화
+    figure = plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True)
+    return plotly.io.to_json(figure, validate=False)
+
+
+def measure(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def bench_before(runs):
+    def rerun():
+        for fig in create_digital_divide_charts(load_survey_data()):
+            serialize_like_streamlit(fig)
+    return measure(rerun, runs)
+
+
+def bench_after(runs):
+    cached = create_digital_divide_charts(load_survey_data())
+    def rerun():
+        for fig in cached:
+            serialize_like_streamlit(fig)
+    return measure(rerun, runs)
+
+
+def bench_page4_rerun(runs):
+    from streamlit.testing.v1 import AppTest
+
+    # 앱의 EventLog는 프로세스가 끝날 때까지 남아 기록하므로 디렉터리를 지우지 않습니다.
+    tmp = tempfile.mkdtemp(prefix='huss-bench-')
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=60)
+    at.secrets["OPENAI_API_KEY"] = "sk-benchmark"
+    at.secrets["TELEMETRY_DIR"] = os.path.join(tmp, "telemetry") # 실제 telemetry/의 완료 시간 통계를 건드리지 않음
+    at.secrets["SESSION_DB"] = os.path.join(tmp, "sessions.sqlite3") # 실제 sessions/에 가짜 세션을 남기지 않음
+    at.session_state.current_page = 3
+    at.run() # 첫 실행은 캐시를 채우므로 측정에서 제외
+    return measure(at.run, runs)
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<28} mean {statistics.mean(samples):8.2f} ms   median {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="페이지 4 그래프 rerun 비용 벤치마크")
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--skip-app', action='store_true', help="AppTest로 app.py 전체를 실행하는 측정은 건너뜀")
+    args = parser.parse_args()
+
+    create_digital_divide_charts(load_survey_data()) # plotly/pandas 첫 로딩 비용 제외
+
+    before = bench_before(args.runs)
+    after = bench_after(args.runs)
+    report("charts before (rebuild)", before)
+    report("charts after (cached)", after)
+    print(f"{'speedup':<28} {statistics.mean(before) / statistics.mean(after):.1f}x")
+
+    if not args.skip_app:
+        report("page 4 rerun (app.py)", bench_page4_rerun(args.runs))
+
+
+if __name__ == '__main__':
+    main()
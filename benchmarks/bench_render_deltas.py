@@ -0,0 +1,59 @@
+"""
+페이지별로 rerun 한 번에 프론트엔드로 보내는 delta 메시지 수와 크기(bytes)를 측정합니다.
+값은 app.py 맨 아래에서 저장하는 st.session_state.render_stats 를 그대로 읽습니다. (METRICS_ENABLED일 때만 측정)
+
+사용법:
+    python benchmarks/bench_render_deltas.py
+"""
+import os
+import sys
+import tempfile
+import threading
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stub_openai_server import make_server
+
+PAGES = [
+    ("page 1 (start)", 0, ''),
+    ("page 2 (elderly form)", 1, 'elderly'),
+    ("page 2 (foreigner form)", 1, 'foreigner'),
+    ("page 3 (report)", 2, 'elderly'),
+    ("page 4 (status)", 3, ''),
+]
+
+
+def measure_page(page, role, base_url, tmp):
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=60)
+    at.secrets["OPENAI_API_KEY"] = "sk-benchmark"
+    at.secrets["OPENAI_BASE_URL"] = base_url
+    at.secrets["TELEMETRY_DIR"] = os.path.join(tmp, "telemetry") # 실제 telemetry/의 완료 시간 통계를 건드리지 않음
+    at.secrets["SESSION_DB"] = os.path.join(tmp, "sessions.sqlite3") # 실제 sessions/에 가짜 세션을 남기지 않음
+    at.secrets["METRICS_ENABLED"] = True
+    at.session_state.current_page = page
+    at.session_state.selected_role = role
+    at.session_state.elapsed_time_for_report = 12.0
+    at.run()
+    at.run() # 두 번째 rerun을 측정 (리포트 생성 등 첫 실행에만 있는 작업 제외)
+    return at.session_state.render_stats
+
+
+def main():
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1/"
+
+    # 앱의 EventLog는 프로세스가 끝날 때까지 남아 기록하므로 디렉터리를 지우지 않습니다.
+    tmp = tempfile.mkdtemp(prefix='huss-bench-')
+    print(f"{'page':<26}{'deltas':>8}{'bytes':>10}")
+    for name, page, role in PAGES:
+        stats = measure_page(page, role, base_url, tmp)
+        print(f"{name:<26}{stats['deltas']:>8}{stats['bytes']:>10}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+새 프로세스의 시작 비용을 측정합니다.
+
+1. import 시간: 새 파이썬 프로세스에서 app.py의 모듈 최상단 import 문만 순서대로 실행하며 문장별 시간을 잽니다.
+   끝난 뒤 무거운 의존성(pandas, plotly, openai, pyarrow ...)이 이미 올라와 있는지도 표시합니다.
+2. 첫 화면까지 걸리는 시간: `streamlit run` 서버를 새로 띄우고 웹소켓으로 붙어서
+   프로세스 시작 -> 포트 열림 -> 페이지 0 첫 rerun 완료(script_finished)까지를 잽니다.
+   같은 서버에 두 번째 세션을 붙여 이미 데운 프로세스의 페이지 0 시간과 비교합니다.
+
+이전 버전과 비교하려면:
+    git worktree add /tmp/before <commit>
+    python benchmarks/bench_startup.py --app /tmp/before/app.py
+    python benchmarks/bench_startup.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ws_session import StreamlitSession, process_rss_bytes, start_streamlit_server
+
+HEAVY_MODULES = ('pandas', 'plotly', 'openai', 'pyarrow', 'tenacity', 'tiktoken')
+
+# 새 프로세스에서 실행하는 코드: app.py의 최상단 import 문을 하나씩 실행하며 시간을 잽니다.
+IMPORT_PROBE = """
+import ast, json, sys, time
+started = time.perf_counter()
+import streamlit
+streamlit_seconds = time.perf_counter() - started
+source = open(sys.argv[1], encoding='utf-8').read()
+timings = []
+for node in ast.parse(source).body:
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        code = compile(ast.Module(body=[node], type_ignores=[]), sys.argv[1], 'exec')
+        t = time.perf_counter()
+        exec(code, {})
+        timings.append((ast.unparse(node), time.perf_counter() - t))
+loaded = [name for name in sys.argv[2].split(',') if name in sys.modules]
+print(json.dumps({'streamlit_seconds': streamlit_seconds, 'statements': timings, 'loaded': loaded}))
+"""
+
+
+def measure_imports(app_path):
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_PROBE, os.path.basename(app_path), ','.join(HEAVY_MODULES)],
+        cwd=os.path.dirname(os.path.abspath(app_path)),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+async def first_render(port):
+    session = StreamlitSession(port)
+    try:
+        result = await session.connect()
+        if not session.has_widget('elderly_role_button'):
+            raise RuntimeError("page 0 did not render the role buttons")
+        return result.latency
+    finally:
+        session.close()
+
+
+def measure_cold_start(app_path, secrets_path):
+    launched = time.perf_counter()
+    server, port = start_streamlit_server(app_path, secrets_path)
+    try:
+        listening = time.perf_counter() - launched
+        cold = asyncio.run(first_render(port))
+        first_paint = time.perf_counter() - launched
+        warm = asyncio.run(first_render(port))
+        return {
+            'port_open_s': listening,
+            'cold_page0_s': cold,
+            'first_paint_s': first_paint,
+            'warm_page0_s': warm,
+            'rss_bytes': process_rss_bytes(server.pid),
+        }
+    finally:
+        server.kill()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', default=os.path.join(ROOT, 'app.py'))
+    parser.add_argument('--runs', type=int, default=3, help="새 프로세스를 몇 번 띄워 측정할지")
+    args = parser.parse_args()
+
+    imports = measure_imports(args.app)
+    print(f"import streamlit: {imports['streamlit_seconds'] * 1000:.0f} ms")
+    for statement, seconds in sorted(imports['statements'], key=lambda s: -s[1])[:8]:
+        print(f"  {seconds * 1000:7.1f} ms  {statement[:90]}")
+    print(f"app.py imports total: {sum(s for _, s in imports['statements']) * 1000:.0f} ms")
+    print(f"loaded after app imports: {', '.join(imports['loaded']) or '-'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets_path = os.path.join(tmp, 'secrets.toml')
+        with open(secrets_path, 'w', encoding='utf-8') as f:
+            f.write('OPENAI_API_KEY = "sk-benchmark"\n')
+            f.write(f'TELEMETRY_DIR = "{os.path.join(tmp, "telemetry")}"\n')
+            f.write(f'SESSION_DB = "{os.path.join(tmp, "sessions.sqlite3")}"\n')
+        runs = [measure_cold_start(args.app, secrets_path) for _ in range(args.runs)]
+
+    print(f"\n{'':22}{'median':>10}{'min':>10}{'max':>10}")
+    for key, label in (('port_open_s', 'server listening'), ('cold_page0_s', 'page 0 (cold process)'),
+                       ('first_paint_s', 'launch -> first paint'), ('warm_page0_s', 'page 0 (warm process)')):
+        values = [run[key] * 1000 for run in runs]
+        print(f"{label:22}{statistics.median(values):>8.0f}ms{min(values):>8.0f}ms{max(values):>8.0f}ms")
+    rss = [run['rss_bytes'] for run in runs if run['rss_bytes']]
+    if rss:
+        print(f"RSS after two sessions: {statistics.median(rss) / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
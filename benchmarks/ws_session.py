@@ -0,0 +1,180 @@
+"""
+실제 `streamlit run` 서버에 브라우저 대신 웹소켓으로 붙어서 앱을 조작하는 최소한의 클라이언트.
+
+브라우저 프론트엔드처럼 BackMsg(rerun_script)를 보내고, 스크립트 실행이 끝날 때(script_finished)까지
+ForwardMsg를 받아 위젯 id/프래그먼트 id를 기억합니다. 벤치마크에서만 사용합니다.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from tornado.websocket import websocket_connect
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+FINISHED = ForwardMsg.ScriptFinishedStatus
+RUN_DONE = (FINISHED.FINISHED_SUCCESSFULLY, FINISHED.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def process_cpu_seconds(pid):
+    """리눅스 /proc 기준 프로세스의 누적 CPU 시간(user + system, 초). 다른 OS에서는 None."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def process_rss_bytes(pid):
+    """리눅스 /proc 기준 현재 RSS(bytes). 다른 OS에서는 None."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def start_streamlit_server(app_path, secrets_path, port=None, extra_args=()):
+    port = port or free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'streamlit', 'run', os.path.basename(app_path),
+            '--server.headless', 'true',
+            '--server.port', str(port),
+            '--server.fileWatcherType', 'none',
+            '--browser.gatherUsageStats', 'false',
+            '--secrets.files', secrets_path,
+            *extra_args,
+        ],
+        cwd=os.path.dirname(os.path.abspath(app_path)), # app.py가 style.css 등을 상대 경로로 읽으므로
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(('127.0.0.1', port)) == 0:
+                return process, port
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("streamlit server did not start")
+
+
+class RunResult:
+    def __init__(self, runs, fragment_runs, deltas, latency):
+        self.runs = runs # 이번 요청으로 실행된 전체 스크립트 rerun 수 (st.rerun() 포함)
+        self.fragment_runs = fragment_runs # 프래그먼트만 다시 실행된 수
+        self.deltas = deltas
+        self.latency = latency # 요청을 보낸 뒤 마지막 script_finished까지 걸린 시간(초)
+
+
+class StreamlitSession:
+    def __init__(self, port, query_string=''):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.query_string = query_string
+        self.connection = None
+        self.widgets = {} # user key -> (widget id, fragment id)
+        self.widget_values = {} # widget id -> WidgetState (프론트엔드처럼 매번 전부 보냄)
+        self.texts = [] # 마지막 rerun에서 받은 markdown/alert 텍스트
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, subprotocols=['streamlit'])
+        return await self.rerun()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def has_widget(self, key):
+        return key in self.widgets
+
+    async def rerun(self, trigger_key=None, fragment_id=''):
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.query_string = self.query_string
+        client_state.fragment_id = fragment_id
+        for state in self.widget_values.values():
+            client_state.widget_states.widgets.append(state)
+        if trigger_key is not None:
+            trigger = WidgetState(id=self.widgets[trigger_key][0], trigger_value=True)
+            client_state.widget_states.widgets.append(trigger)
+
+        started = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        return await self._read_until_finished(started, fragment_id)
+
+    async def click(self, key):
+        _, fragment_id = self.widgets[key]
+        return await self.rerun(trigger_key=key, fragment_id=fragment_id)
+
+    async def set_text(self, key, value):
+        widget_id, fragment_id = self.widgets[key]
+        self.widget_values[widget_id] = WidgetState(id=widget_id, string_value=value)
+        return await self.rerun(fragment_id=fragment_id)
+
+    async def set_checkbox(self, key, value):
+        widget_id, fragment_id = self.widgets[key]
+        self.widget_values[widget_id] = WidgetState(id=widget_id, bool_value=value)
+        return await self.rerun(fragment_id=fragment_id)
+
+    async def _read_until_finished(self, started, fragment_id):
+        runs = fragment_runs = deltas = 0
+        seen_widgets = {}
+        texts = []
+        while True:
+            raw = await self.connection.read_message()
+            if raw is None:
+                raise ConnectionError("websocket closed")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof('type')
+            if kind == 'delta':
+                deltas += 1
+                self._remember_element(fwd.delta, seen_widgets, texts)
+            elif kind == 'script_finished':
+                status = fwd.script_finished
+                if status == FINISHED.FINISHED_FRAGMENT_RUN_SUCCESSFULLY:
+                    fragment_runs += 1
+                else:
+                    runs += 1
+                if status in RUN_DONE:
+                    break
+        if not fragment_id:
+            # 전체 rerun 후에는 화면에 남아 있는 위젯만 기억합니다.
+            self.widgets = seen_widgets
+            live_ids = {widget_id for widget_id, _ in seen_widgets.values()}
+            self.widget_values = {k: v for k, v in self.widget_values.items() if k in live_ids}
+            self.texts = texts
+        else:
+            self.widgets.update(seen_widgets)
+            self.texts.extend(texts)
+        return RunResult(runs, fragment_runs, deltas, time.perf_counter() - started)
+
+    def _remember_element(self, delta, seen_widgets, texts):
+        if delta.WhichOneof('type') != 'new_element':
+            return
+        element = delta.new_element
+        element_type = element.WhichOneof('type')
+        if element_type == 'markdown':
+            texts.append(element.markdown.body)
+        elif element_type == 'alert':
+            texts.append(element.alert.body)
+        proto = getattr(element, element_type, None)
+        widget_id = getattr(proto, 'id', '')
+        if widget_id.startswith('$$ID-'):
+            user_key = widget_id.split('-', 2)[2]
+            seen_widgets[user_key] = (widget_id, delta.fragment_id)
@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# --- 페이지 4 현황 그래프 ---
+# 설문 수치는 data/ 아래의 버전이 붙은 JSON 파일에서 읽습니다.
+# 수치를 바꿀 때는 기존 파일을 고치지 말고 새 버전 파일(_v2 ...)을 추가한 뒤 SURVEY_DATA_PATH를 바꿔주세요.
+
+SURVEY_DATA_PATH = Path(__file__).parent / 'data' / 'digital_divide_survey_v1.json'
+
+
+def load_survey_data(path=SURVEY_DATA_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def create_pie_chart(chart):
+    data = pd.DataFrame({
+        '사용 빈도': chart['categories'],
+        '응답자 수': chart['counts']
+    })
+
+    fig = px.pie(
+        data,
+        values='응답자 수',
+        names='사용 빈도',
+        title=chart['title'],
+        color_discrete_sequence=getattr(px.colors.sequential, chart['palette']),
+        hole=0.3 # 도넛 모양으로 만들기
+    )
+
+    # 차트 디자인 업데이트
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent+label', # 차트 안에 퍼센트와 라벨 표시
+        pull=[0.05] + [0] * (len(chart['categories']) - 1) # 가장 큰 조각을 약간 떼어내어 강조
+    )
+    fig.update_layout(
+        height=400,
+        showlegend=False, # 범례는 숨김 (차트에 라벨이 표시되므로)
+        title_font_size=16,
+        margin=dict(t=50, b=20, l=20, r=20)
+    )
+    return fig
+
+
+def create_digital_divide_charts(survey=None):
+    """
+    고령층과 외국인의 소통 목적 인터넷 사용 현황에 대한
+    파이차트를 설문 데이터 파일에 적힌 순서대로 생성합니다.
+    """
+    if survey is None:
+        survey = load_survey_data()
+    return tuple(create_pie_chart(chart) for chart in survey['charts'])
+
+
+def create_completion_time_chart(summary, title, highlight_label=None):
+    """
+    참여자 소요 시간 분포 막대그래프 (CompletionStats.summary() 결과 사용).
+    highlight_label 구간(현재 참여자가 속한 구간)은 다른 색으로 강조합니다.
+    """
+    labels, counts = summary['labels'], summary['counts']
+    # 뒤쪽의 빈 구간은 잘라냅니다. (강조할 구간까지는 남김)
+    last = max([i for i, count in enumerate(counts) if count] + [labels.index(highlight_label) if highlight_label in labels else 0])
+    labels, counts = labels[:last + 1], counts[:last + 1]
+
+    fig = go.Figure(go.Bar(
+        x=labels,
+        y=counts,
+        marker_color=['#d62728' if label == highlight_label else '#6baed6' for label in labels],
+    ))
+    fig.update_layout(
+        title=title,
+        height=400,
+        showlegend=False,
+        title_font_size=16,
+        xaxis_title='소요 시간',
+        yaxis_title='참여자 수',
+        bargap=0.1,
+        margin=dict(t=50, b=20, l=20, r=20)
+    )
+    return fig
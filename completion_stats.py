@@ -0,0 +1,236 @@
+import logging
+import math
+import threading
+import time
+
+# --- 역할별 완료 시간 집계 ---
+# 신청을 마친 참여자의 소요 시간을 역할별로 누적합니다. 기록은 O(1)이고, 조회도 기록 수와 무관하게
+# 고정된 구간 수만큼만 봅니다 (지금까지의 기록을 다시 훑지 않음).
+#  - QuantileSketch: 로그 간격 구간 스케치(DDSketch 방식). 분위수/순위를 상대 오차 relative_accuracy 안에서 계산
+#  - TimeHistogram: 페이지 4 분포 그래프용 고정 폭 히스토그램 (마지막 구간은 max_seconds 이상 전부)
+# 두 구조 모두 구간별 개수일 뿐이므로, 여러 복제본의 기록을 공유 저장소(shared_store)의 카운터로 더해 합칠 수 있습니다.
+# 구간 번호는 설정(relative_accuracy, STATS_BIN_SECONDS 등)에 따라 뜻이 달라지므로 카운터 이름에 설정을 넣습니다.
+# 설정이 다른 복제본/이전 실행의 구간 카운터는 읽지 않습니다 (참여자 수와 합계는 설정과 무관해 그대로 합침).
+
+logger = logging.getLogger(__name__)
+
+COUNTER_NAMESPACE = 'completion'
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy=0.02, min_value=0.5, max_value=3600.0):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self._offset = self._raw_index(min_value)
+        self._counts = [0] * (self._raw_index(max_value) - self._offset + 1)
+        self.count = 0
+
+    def counter_name(self):
+        """공유 저장소의 구간 카운터 이름. 설정이 같아야 구간 번호가 같은 범위를 뜻합니다."""
+        return f'sketch:{self.relative_accuracy:g}:{self.min_value:g}:{self.max_value:g}'
+
+    def _raw_index(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _index(self, value):
+        value = min(max(value, self.min_value), self.max_value) # 범위 밖 값은 양 끝 구간에 넣음
+        return self._raw_index(value) - self._offset
+
+    def _value(self, index):
+        # 구간 (gamma^(i-1), gamma^i] 의 대표값. 이 구간의 어떤 값과도 상대 오차가 relative_accuracy 이하
+        return 2 * math.exp((index + self._offset) * self._log_gamma) / (1 + math.exp(self._log_gamma))
+
+    def add(self, value):
+        self._counts[self._index(value)] += 1
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen > rank:
+                return self._value(index)
+        return self._value(len(self._counts) - 1)
+
+    def rank(self, value):
+        """value보다 작은 값의 비율 (0.0-1.0). 같은 구간에 든 값은 절반만 셉니다."""
+        if not self.count:
+            return None
+        index = self._index(value)
+        below = sum(self._counts[:index])
+        return (below + self._counts[index] / 2) / self.count
+
+
+class TimeHistogram:
+    def __init__(self, bin_seconds=10, max_seconds=300):
+        self.bin_seconds = bin_seconds
+        self.max_seconds = max_seconds
+        self.counts = [0] * (max_seconds // bin_seconds + 1)
+
+    def counter_name(self):
+        return f'hist:{self.bin_seconds:g}:{self.max_seconds:g}'
+
+    def bin_index(self, seconds):
+        return min(int(max(seconds, 0) // self.bin_seconds), len(self.counts) - 1)
+
+    def add(self, seconds):
+        self.counts[self.bin_index(seconds)] += 1
+
+    def labels(self):
+        labels = [f"{i * self.bin_seconds}~{(i + 1) * self.bin_seconds}초" for i in range(len(self.counts) - 1)]
+        return labels + [f"{self.max_seconds}초 이상"]
+
+
+class RoleStats:
+    def __init__(self, relative_accuracy, bin_seconds, max_seconds):
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.histogram = TimeHistogram(bin_seconds, max_seconds)
+        self.count = 0
+        self.total_seconds = 0.0
+
+    def add(self, seconds):
+        self.sketch.add(seconds)
+        self.histogram.add(seconds)
+        self.count += 1
+        self.total_seconds += seconds
+
+
+class CompletionStats:
+    """
+    프로세스 전체에서 공유하는 역할별 완료 시간 집계. 모든 메서드는 스레드 안전합니다.
+    store(shared_store.SharedStore)를 주면 기록할 때 저장소의 카운터에도 더하고, 조회할 때는
+    refresh_seconds가 지났을 때만 저장소의 합계(모든 복제본의 기록)로 로컬 집계를 바꿉니다.
+    """
+
+    def __init__(self, relative_accuracy=0.02, bin_seconds=10, max_seconds=300, store=None, refresh_seconds=5.0):
+        self.relative_accuracy = relative_accuracy
+        self.bin_seconds = bin_seconds
+        self.max_seconds = max_seconds
+        self.store = store
+        self.refresh_seconds = refresh_seconds
+        self._refreshed_at = None
+        self._roles = {}
+        self._lock = threading.Lock()
+        self._warned_mismatch = False
+
+    def _role(self, role):
+        if role not in self._roles:
+            self._roles[role] = RoleStats(self.relative_accuracy, self.bin_seconds, self.max_seconds)
+        return self._roles[role]
+
+    def _add(self, role, seconds, deltas):
+        # 로컬 집계에 더하고, 저장소에 보낼 카운터 증가량을 deltas에 모읍니다. (_lock 안에서 호출)
+        stats = self._role(role)
+        stats.add(seconds)
+        if deltas is not None:
+            for name, amount in (
+                ('count', 1),
+                ('total', seconds),
+                (f'{stats.sketch.counter_name()}|{stats.sketch._index(seconds)}', 1),
+                (f'{stats.histogram.counter_name()}|{stats.histogram.bin_index(seconds)}', 1),
+            ):
+                key = f'{role}|{name}'
+                deltas[key] = deltas.get(key, 0) + amount
+
+    def _push(self, deltas):
+        if deltas:
+            try:
+                self.store.increment(COUNTER_NAMESPACE, deltas)
+            except Exception:
+                logger.exception("shared completion counters update failed")
+
+    def record(self, role, seconds):
+        deltas = {} if self.store is not None else None
+        with self._lock:
+            self._add(role, seconds, deltas)
+        self._push(deltas)
+
+    def load(self, completions):
+        """
+        (역할, 소요 시간) 목록으로 집계를 채웁니다. 프로세스 시작 시 텔레메트리 기록에서 한 번만 사용합니다.
+        공유 저장소를 쓰면 저장소에도 더하므로, 복제본 중 하나만 호출해야 합니다. (app.py 참고)
+        """
+        deltas = {} if self.store is not None else None
+        with self._lock:
+            for role, seconds in completions:
+                self._add(role, seconds, deltas)
+        self._push(deltas)
+
+    def refresh(self, force=False):
+        """저장소의 합계로 로컬 집계를 바꿉니다. refresh_seconds 안에 이미 읽었으면 아무것도 하지 않습니다."""
+        if self.store is None:
+            return
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_seconds:
+            return
+        self._refreshed_at = now
+        try:
+            counters = self.store.counters(COUNTER_NAMESPACE)
+        except Exception:
+            logger.exception("shared completion counters read failed")
+            return
+        roles = {}
+        skipped = 0
+        for key, value in counters.items():
+            role, name, *index = key.split('|')
+            stats = roles.get(role)
+            if stats is None:
+                stats = roles[role] = RoleStats(self.relative_accuracy, self.bin_seconds, self.max_seconds)
+            if name == 'count':
+                stats.count = int(value)
+            elif name == 'total':
+                stats.total_seconds = value
+            elif name == stats.sketch.counter_name() and 0 <= int(index[0]) < len(stats.sketch._counts):
+                stats.sketch._counts[int(index[0])] = int(value)
+            elif name == stats.histogram.counter_name() and 0 <= int(index[0]) < len(stats.histogram.counts):
+                stats.histogram.counts[int(index[0])] = int(value)
+            else:
+                skipped += 1
+        for stats in roles.values():
+            # 분위수/순위는 이 설정의 구간에 든 기록만으로 계산합니다.
+            stats.sketch.count = sum(stats.sketch._counts)
+        if skipped and not self._warned_mismatch:
+            self._warned_mismatch = True
+            logger.warning(
+                "ignored %d shared completion counters written with different bin settings "
+                "(STATS_BIN_SECONDS / STATS_MAX_SECONDS)", skipped,
+            )
+        with self._lock:
+            self._roles = roles
+
+    def slower_than(self, role, seconds):
+        """
+        이 역할 참여자 중 seconds보다 빨리 끝낸 비율(0-100)과 비교한 참여자 수.
+        아직 기록이 없으면 (None, 0).
+        """
+        self.refresh()
+        with self._lock:
+            if role not in self._roles or not self._roles[role].sketch.count:
+                return None, 0
+            stats = self._roles[role]
+            return stats.sketch.rank(seconds) * 100, stats.sketch.count
+
+    def summary(self, role):
+        """페이지 4 표시용: 참여자 수, 평균/중앙값/90% 분위 소요 시간, 히스토그램 구간 이름과 개수."""
+        self.refresh()
+        with self._lock:
+            stats = self._roles.get(role)
+            if stats is None or not stats.sketch.count:
+                return None
+            return {
+                'count': stats.count,
+                'mean': stats.total_seconds / stats.count,
+                'median': stats.sketch.quantile(0.5),
+                'p90': stats.sketch.quantile(0.9),
+                'labels': stats.histogram.labels(),
+                'counts': list(stats.histogram.counts),
+            }
+
+    def bin_label(self, seconds):
+        histogram = TimeHistogram(self.bin_seconds, self.max_seconds)
+        return histogram.labels()[histogram.bin_index(seconds)]
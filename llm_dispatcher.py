@@ -0,0 +1,267 @@
+import functools
+import itertools
+import queue
+import random
+import threading
+import time
+
+from concurrent.futures import CancelledError
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# --- 공용 LLM 요청 디스패처 ---
+# 모든 세션의 GPT 호출이 이 디스패처 하나를 거쳐 나갑니다.
+#  - 고정 크기 워커 풀: 동시에 나가는 요청 수 제한
+#  - 토큰 버킷: 초당 요청 수 제한 (공급자 rate limit 보호)
+#  - 대기열 길이 제한: 넘치면 즉시 QueueFullError
+#  - tenacity 재시도 (지터가 섞인 지수 백오프)
+#  - 서킷 브레이커: 백엔드가 계속 실패하면 기다리지 않고 바로 CircuitOpenError
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors():
+    """재시도해 볼 만한 오류 (일시적인 서버/네트워크 문제). openai는 처음 필요할 때 import합니다."""
+    import openai
+    return (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )
+
+
+def is_retryable(error):
+    return isinstance(error, retryable_errors())
+
+
+class TokenBucket:
+    """초당 rate개씩 토큰이 차오르고 최대 burst개까지 쌓이는 토큰 버킷."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    요청이 연속 failure_threshold번 실패하면 열림(open) 상태가 되어 cooldown_seconds 동안 요청을 바로 거절합니다.
+    (실패는 재시도까지 모두 끝난 요청 하나당 한 번, 일시적인 오류일 때만 셉니다. LLMDispatcher 참고)
+    쿨다운이 지나면 요청 하나만 시험 삼아 통과시키고(half-open), 성공하면 닫히고 실패하면 다시 열립니다.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                return 'half-open'
+            return 'open'
+
+    def allow_request(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class Ticket:
+    """
+    디스패처에 제출된 요청 하나. 세션 스레드는 이 객체를 폴링하며
+    대기 순번/대기 시간/스트리밍 중인 부분 텍스트를 화면에 보여줍니다.
+    """
+
+    def __init__(self, dispatcher, seq):
+        self._dispatcher = dispatcher
+        self.seq = seq
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.partial_text = ''
+        self.attempts = 0
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self._subscribers = 1
+        self._done = threading.Event()
+
+    def queue_position(self):
+        """앞에 남아 있는 요청 수 (0이면 처리 중이거나 완료)."""
+        if self.started_at is not None:
+            return 0
+        return max(self.seq - self._dispatcher.next_start_seq, 0)
+
+    def wait_time(self):
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.submitted_at
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def set_partial_text(self, text):
+        self.partial_text = text
+
+    def join(self):
+        """
+        다른 세션/페이지가 같은 요청의 결과를 함께 기다릴 때 호출합니다.
+        이미 취소된 요청이면 합류하지 않고 False를 돌려줍니다. (호출한 쪽은 새로 제출해야 함)
+        release()와 같은 잠금 안에서 확인하므로, 확인한 직후에 취소되는 일은 없습니다.
+        """
+        with self._dispatcher._lock:
+            if self.cancelled:
+                return False
+            self._subscribers += 1
+            return True
+
+    def release(self):
+        """
+        더 이상 결과가 필요 없을 때 호출합니다. 아무도 기다리지 않고 아직 워커가 꺼내지 않은
+        요청이면 취소되어 GPT 호출 없이 버려집니다. 이미 실행 중이면 끝까지 실행됩니다.
+        """
+        with self._dispatcher._lock:
+            self._subscribers -= 1
+            if self._subscribers <= 0 and self.started_at is None:
+                self.cancelled = True
+
+    def _finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.finished_at = time.monotonic()
+        self._done.set()
+
+
+class LLMDispatcher:
+    def __init__(self, max_workers=8, rate_per_second=5.0, burst=10, max_queue=200,
+                 max_attempts=4, breaker=None):
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.rate_limiter = TokenBucket(rate_per_second, burst)
+        self.breaker = breaker or CircuitBreaker()
+        self.next_start_seq = 0 # 다음에 워커가 꺼낼 티켓 번호 (대기 순번 계산용)
+        self._seq = itertools.count()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"llm-dispatcher-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        fn(ticket, *args, **kwargs)를 워커 풀에서 실행하도록 대기열에 넣고 Ticket을 돌려줍니다.
+        서킷이 열려 있거나 대기열이 가득 차 있으면 기다리지 않고 바로 예외를 던집니다.
+        """
+        if self.breaker.state == 'open':
+            raise CircuitOpenError("LLM backend is failing; circuit is open")
+        with self._lock:
+            if self._queue.qsize() >= self.max_queue:
+                raise QueueFullError(f"LLM queue is full ({self.max_queue} requests waiting)")
+            ticket = Ticket(self, next(self._seq))
+            self._queue.put((ticket, fn, args, kwargs))
+        return ticket
+
+    def _worker(self):
+        while True:
+            ticket, fn, args, kwargs = self._queue.get()
+            with self._lock:
+                self.next_start_seq = max(self.next_start_seq, ticket.seq + 1)
+                if not ticket.cancelled:
+                    ticket.started_at = time.monotonic()
+            if ticket.cancelled:
+                ticket._finish(error=CancelledError())
+                self._queue.task_done()
+                continue
+            try:
+                ticket._finish(result=self._call_with_retries(ticket, fn, args, kwargs))
+            except Exception as e:
+                ticket._finish(error=e)
+            finally:
+                self._queue.task_done()
+
+    def _call_with_retries(self, ticket, fn, args, kwargs):
+        # 서킷 브레이커에는 요청 하나를 한 번만 기록합니다. 재시도 중간의 실패는 세지 않고,
+        # 형식 오류처럼 일시적이지 않은 오류는 백엔드가 응답은 한 것이므로 실패로 세지 않습니다.
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("LLM backend is failing; circuit is open")
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=0.5, max=8),
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        )
+        try:
+            for attempt in retrying:
+                with attempt:
+                    self.rate_limiter.acquire()
+                    ticket.attempts += 1
+                    ticket.partial_text = '' # 재시도 시 이전 시도의 부분 응답은 버림
+                    result = fn(ticket, *args, **kwargs)
+        except Exception as e:
+            if is_retryable(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+
+def jittered_poll_interval(base=0.1):
+    # 여러 세션이 같은 박자로 폴링하지 않도록 약간의 지터를 줍니다.
+    return base * (0.75 + random.random() * 0.5)
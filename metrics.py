@@ -0,0 +1,201 @@
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- 성능 계측과 Prometheus 텍스트 내보내기 ---
+# rerun 전체 시간(페이지별), 이름 붙인 구간 시간(페이지 x 구간), LLM 호출 수/토큰 수/지연 시간을 모읍니다.
+# METRICS_PORT를 설정하면 http://127.0.0.1:<port>/metrics 에서 Prometheus 텍스트 형식으로 내보냅니다.
+# 계측을 끄면 section()은 미리 만들어 둔 빈 컨텍스트를 돌려주고 observe/inc는 바로 돌아오므로
+# 비용은 속성 확인 한 번 정도입니다.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL_SECTION = nullcontext()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_label_text(key)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {} # labels -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def summary(self):
+        """관리자 페이지용: labels -> (개수, 평균)"""
+        with self._lock:
+            return {key: (s[-1], s[-2] / s[-1] if s[-1] else 0.0) for key, s in self._series.items()}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_label_text(key + (("le", bound),))} {cumulative}')
+                lines.append(f'{self.name}_bucket{_label_text(key + (("le", "+Inf"),))} {series[-1]}')
+                lines.append(f'{self.name}_sum{_label_text(key)} {series[-2]}')
+                lines.append(f'{self.name}_count{_label_text(key)} {series[-1]}')
+        return lines
+
+
+class Gauge:
+    """값을 따로 저장하지 않고 내보낼 때마다 fn()을 호출합니다. (대기열 길이, 캐시 크기 등)"""
+
+    def __init__(self, name, help_text, fn):
+        self.name = name
+        self.help_text = help_text
+        self.fn = fn
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} gauge', f'{self.name} {self.fn()}']
+
+
+class _Section:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=True, prefix='huss'):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._metrics = []
+        self.rerun_seconds = self.histogram('rerun_seconds', "Script rerun duration by page index")
+        self.section_seconds = self.histogram('section_seconds', "Duration of named sections within a rerun")
+        self.llm_requests = self.counter('llm_requests_total', "LLM API calls by outcome (ok/error)")
+        self.llm_latency_seconds = self.histogram('llm_latency_seconds', "Time from LLM request to last token")
+        self.llm_ttft_seconds = self.histogram('llm_ttft_seconds', "Time from LLM request to first token")
+        self.llm_prompt_tokens = self.counter('llm_prompt_tokens_total', "Prompt tokens reported by the LLM API")
+        self.llm_completion_tokens = self.counter('llm_completion_tokens_total', "Completion tokens reported by the LLM API")
+        self.llm_local_prompt_tokens = self.counter('llm_local_prompt_tokens_total', "Prompt tokens counted locally before sending")
+        self.llm_local_completion_tokens = self.counter('llm_local_completion_tokens_total', "Completion tokens counted locally from the response")
+
+    def counter(self, name, help_text):
+        metric = Counter(f'{self.prefix}_{name}', help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        metric = Histogram(f'{self.prefix}_{name}', help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, fn):
+        metric = Gauge(f'{self.prefix}_{name}', help_text, fn)
+        self._metrics.append(metric)
+        return metric
+
+    def section(self, name, page):
+        """with metrics.section('charts', page): ... 로 구간 시간을 잽니다."""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self.section_seconds, {'page': page, 'section': name})
+
+    def observe_rerun(self, page, seconds):
+        if self.enabled:
+            self.rerun_seconds.observe(seconds, page=page)
+
+    def observe_llm_call(self, timing=None, error=None):
+        """워커 스레드에서 LLM 호출 한 번(재시도 포함 각 시도)이 끝날 때 호출합니다."""
+        if not self.enabled:
+            return
+        if error is not None:
+            self.llm_requests.inc(outcome='error', error=type(error).__name__)
+            return
+        self.llm_requests.inc(outcome='ok')
+        self.llm_latency_seconds.observe(timing['total'])
+        self.llm_ttft_seconds.observe(timing['ttft'])
+        if timing.get('prompt_tokens') is not None:
+            self.llm_prompt_tokens.inc(timing['prompt_tokens'])
+        if timing.get('completion_tokens') is not None:
+            self.llm_completion_tokens.inc(timing['completion_tokens'])
+        if timing.get('local_prompt_tokens') is not None:
+            self.llm_local_prompt_tokens.inc(timing['local_prompt_tokens'])
+        if timing.get('local_completion_tokens') is not None:
+            self.llm_local_completion_tokens.inc(timing['local_completion_tokens'])
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception: # 게이지 콜백 하나가 실패해도 나머지는 내보냅니다.
+                continue
+        return '\n'.join(lines) + '\n'
+
+
+def start_metrics_server(metrics, port, host='127.0.0.1'):
+    """GET /metrics 에 Prometheus 텍스트를 돌려주는 서버를 데몬 스레드로 띄웁니다."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,91 @@
+import re
+from pathlib import Path
+from string import Template
+
+from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+
+# --- 템플릿 기반 페이지 렌더러 ---
+# 페이지마다 따로따로 보내던 st.markdown HTML 조각(여는 div, 제목, 문단, 닫는 div ...)을
+# templates/*.html 의 섹션 하나당 하나의 HTML 블록으로 묶어 보냅니다.
+# 템플릿과 style.css는 프로세스당 한 번만 읽고(압축해서) 재사용합니다.
+
+BASE_DIR = Path(__file__).parent
+TEMPLATE_DIR = BASE_DIR / 'templates'
+STYLE_PATH = BASE_DIR / 'style.css'
+
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S) # 주석 제거
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def compact_html(html):
+    # 줄 앞뒤 공백과 빈 줄을 없앱니다. (빈 줄이 있으면 마크다운이 HTML 블록을 끊어버리므로)
+    return '\n'.join(line.strip() for line in html.splitlines() if line.strip())
+
+
+def load_style_block(path=STYLE_PATH):
+    with open(path, encoding='utf-8') as f:
+        return f'<style>{minify_css(f.read())}</style>'
+
+
+class PageRenderer:
+    """
+    templates/ 폴더의 섹션 템플릿을 미리 읽어 둡니다.
+    $변수가 없는 정적 섹션은 로딩 시점에 완성된 HTML로 만들어 두고, 나머지는 render() 때 값을 채웁니다.
+    """
+
+    def __init__(self, template_dir=TEMPLATE_DIR):
+        self._static = {}
+        self._templates = {}
+        for path in sorted(Path(template_dir).glob('*.html')):
+            template = Template(compact_html(path.read_text(encoding='utf-8')))
+            if template.get_identifiers():
+                self._templates[path.stem] = template
+            else:
+                self._static[path.stem] = template.template
+
+    def render(self, name, **values):
+        if name in self._static:
+            return self._static[name]
+        return self._templates[name].substitute(values)
+
+
+class RenderStats:
+    """한 번의 rerun 동안 프론트엔드로 보낸 delta 메시지 수와 크기(bytes)."""
+
+    def __init__(self):
+        self.deltas = 0
+        self.bytes = 0
+
+    def as_dict(self):
+        return {'deltas': self.deltas, 'bytes': self.bytes}
+
+
+def start_render_stats():
+    """
+    현재 세션의 메시지 전송 함수를 감싸서 delta 수와 바이트 수를 셉니다.
+    스크립트 맨 위에서 매 rerun마다 호출하면 카운터가 0부터 다시 시작합니다.
+    비공개 API(ScriptRunContext._enqueue)를 바꾸므로 측정할 때만 쓰세요. 없으면 세지 않고 빈 RenderStats를 돌려줍니다.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None or not hasattr(ctx, '_enqueue'):
+        return RenderStats()
+    stats = getattr(ctx, 'render_stats', None)
+    if stats is None:
+        stats = RenderStats()
+        enqueue = ctx._enqueue
+
+        def counting_enqueue(msg):
+            if msg.HasField('delta'):
+                stats.deltas += 1
+                stats.bytes += msg.ByteSize()
+            enqueue(msg)
+
+        ctx._enqueue = counting_enqueue
+        ctx.render_stats = stats
+    stats.deltas = 0
+    stats.bytes = 0
+    return stats
@@ -0,0 +1,152 @@
+import json
+import logging
+import time
+from pathlib import Path
+
+from ai_report import assemble_report, build_report_messages, elapsed_time_bucket, request_report
+
+# --- 리포트 생성 백엔드 ---
+# 페이지 3의 리포트를 누가 만들지 고르는 부분입니다. 모든 백엔드는 같은 generate(role, elapsed_ms, on_update)를 가지며
+# {{NAME}} / {{ELAPSED}} 자리표시자가 든 마크다운 리포트와 타이밍 dict를 돌려줍니다.
+# role은 시나리오 id('elderly')이고, 프롬프트와 리포트 문장에는 role_labels의 표시 이름('고령자')을 씁니다.
+#  - OpenAIBackend: OpenAI 호환 HTTP API (base_url로 로컬 서버도 가능). remote=True라서 app.py가 디스패처로 보냄
+#  - LocalTemplateBackend: 네트워크 없이 역할과 소요 시간(ms)만으로 같은 4개 섹션 리포트를 만드는 규칙 기반 엔진
+#  - FallbackChain: 앞의 백엔드가 실패하면 다음 백엔드로 넘어감
+# 백엔드 순서는 secrets.toml 의 REPORT_BACKENDS (예: ["openai", "local"])로 정합니다.
+
+logger = logging.getLogger(__name__)
+
+LOCAL_REPORT_SPEC_PATH = Path(__file__).parent / 'data' / 'local_reports_v1.json'
+
+BACKEND_NAMES = ('openai', 'local')
+
+
+class OpenAIBackend:
+    name = 'openai'
+    remote = True
+
+    def __init__(self, api_key, base_url=None, bucket_seconds=10, streaming=True, timeout=60.0, role_labels=None):
+        import openai # 원격 백엔드를 실제로 만들 때만 불러옵니다. (app.py가 첫 화면 뒤에 미리 import해 둠)
+        # 재시도는 llm_dispatcher가 tenacity로 직접 처리하므로 클라이언트 내부 재시도는 끕니다.
+        self.client = openai.OpenAI(api_key=api_key, base_url=base_url or None, max_retries=0, timeout=timeout)
+        self.bucket_seconds = bucket_seconds
+        self.streaming = streaming
+        self.role_labels = role_labels or {}
+
+    def generate(self, role, elapsed_ms, on_update=None):
+        # 프롬프트에는 소요 시간 구간만 들어가므로 같은 구간이면 elapsed_ms가 달라도 같은 요청입니다.
+        label = self.role_labels.get(role, role)
+        bucket = elapsed_time_bucket(elapsed_ms / 1000, self.bucket_seconds)
+        messages = build_report_messages(label, bucket, self.bucket_seconds)
+        return request_report(self.client, label, messages, stream=self.streaming, on_update=on_update)
+
+
+class LocalTemplateBackend:
+    """
+    data/local_reports_v1.json 의 역할별 문구로 리포트를 조립합니다. 같은 (역할, elapsed_ms)면 항상 같은 리포트입니다.
+    어려움 목록에서 elapsed_ms에 따라 3가지를 고르고, 소요 시간 구간에 맞는 문장을 첫 항목에 덧붙입니다.
+    """
+
+    name = 'local'
+    remote = False
+
+    def __init__(self, spec_path=LOCAL_REPORT_SPEC_PATH, role_labels=None):
+        with open(spec_path, encoding='utf-8') as f:
+            spec = json.load(f)
+        self.role_labels = role_labels or {}
+        self.roles = spec['roles']
+        self.default = spec['default']
+        self.pace_notes = spec['pace_notes']
+
+    def _pace_note(self, elapsed_ms):
+        for pace in self.pace_notes:
+            if pace['under_seconds'] is None or elapsed_ms < pace['under_seconds'] * 1000:
+                return pace['note']
+        return ''
+
+    def build(self, role, elapsed_ms):
+        entry = self.roles.get(role, self.default)
+        pool = entry['difficulties']
+        offset = elapsed_ms % len(pool)
+        difficulties = [dict(pool[(offset + i) % len(pool)]) for i in range(min(3, len(pool)))]
+        note = self._pace_note(elapsed_ms)
+        if note:
+            difficulties[0]['description'] = f"{difficulties[0]['description']} {note}"
+        return {'difficulties': difficulties, 'proposals': entry['proposals']}
+
+    def generate(self, role, elapsed_ms, on_update=None):
+        started = time.perf_counter()
+        report = assemble_report(self.role_labels.get(role, role), self.build(role, int(elapsed_ms)))
+        total = time.perf_counter() - started
+        return report, {'ttft': total, 'total': total}
+
+
+class FallbackChain:
+    """backends를 순서대로 시도해 처음 성공한 리포트를 돌려줍니다. 타이밍의 'backend'에 실제로 쓰인 백엔드 이름이 들어갑니다."""
+
+    def __init__(self, backends):
+        if not backends:
+            raise ValueError("FallbackChain needs at least one backend")
+        self.backends = list(backends)
+
+    @property
+    def primary(self):
+        return self.backends[0]
+
+    @property
+    def fallback(self):
+        """첫 백엔드를 뺀 나머지 체인 (없으면 None). app.py가 첫 백엔드를 디스패처로 보낸 뒤 실패하면 사용합니다."""
+        return FallbackChain(self.backends[1:]) if len(self.backends) > 1 else None
+
+    @property
+    def names(self):
+        return [backend.name for backend in self.backends]
+
+    def generate(self, role, elapsed_ms, on_update=None):
+        last_error = None
+        for backend in self.backends:
+            try:
+                report, timing = backend.generate(role, elapsed_ms, on_update)
+            except Exception as e:
+                logger.warning("report backend %s failed: %r", backend.name, e)
+                last_error = e
+                continue
+            timing['backend'] = backend.name
+            return report, timing
+        raise last_error
+
+
+def resolve_backend_names(names, openai_api_key=None):
+    """
+    설정된 백엔드 이름 목록을 검사해 실제로 쓸 이름 목록을 돌려줍니다. 백엔드 객체는 만들지 않으므로 시작 시점에 바로 부를 수 있습니다.
+    API 키가 없으면 'openai'는 건너뛰므로 키 없이 실행해도 'local'만으로 동작합니다.
+    목록이 아니거나, 모르는 이름이 있거나, 남는 백엔드가 없으면 ValueError.
+    """
+    if isinstance(names, str) or not isinstance(names, (list, tuple)):
+        raise ValueError(f"report backends must be a list such as [\"openai\", \"local\"], got {names!r}")
+    resolved = []
+    for name in names:
+        if name not in BACKEND_NAMES:
+            raise ValueError(f"unknown report backend {name!r} (expected one of {BACKEND_NAMES})")
+        if name == 'openai' and not openai_api_key:
+            logger.warning("OPENAI_API_KEY is not set; skipping the openai report backend")
+            continue
+        resolved.append(name)
+    if not resolved:
+        raise ValueError(f"no usable report backend in {list(names)} (the openai backend needs OPENAI_API_KEY)")
+    return resolved
+
+
+def make_report_backends(names, openai_api_key=None, openai_base_url=None, bucket_seconds=10, streaming=True,
+                         role_labels=None):
+    """
+    이름 목록으로 FallbackChain을 만듭니다. 검사 규칙은 resolve_backend_names()와 같습니다.
+    role_labels는 scenarios.role_labels()의 {역할 id: 표시 이름}입니다.
+    """
+    backends = []
+    for name in resolve_backend_names(names, openai_api_key):
+        if name == 'openai':
+            backends.append(OpenAIBackend(openai_api_key, openai_base_url, bucket_seconds, streaming, role_labels=role_labels))
+        else:
+            backends.append(LocalTemplateBackend(role_labels=role_labels))
+    return FallbackChain(backends)
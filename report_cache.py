@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from shared_store import report_store_key
+
+# --- AI 리포트 캐시 ---
+# (역할, 소요 시간 구간, 프롬프트 버전)이 같으면 GPT에 보내는 프롬프트가 완전히 같으므로,
+# 한 번 생성한 리포트를 모든 세션이 재사용합니다. 이름/정확한 시간은 조회 후 자리표시자에 채웁니다.
+# store(shared_store.SharedStore)를 주면 다른 복제본이 만든 리포트도 재사용합니다.
+
+logger = logging.getLogger(__name__)
+
+
+class ReportCache:
+    """
+    LRU + TTL 방식의 스레드 안전 캐시.
+    - max_entries: 저장할 최대 리포트 수
+    - max_bytes: 저장된 리포트 텍스트(UTF-8)의 최대 총 크기
+    - ttl_seconds: 저장 후 이 시간이 지나면 만료
+    한도를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    store가 있으면 로컬에 없는 키는 store에서 읽어 로컬에 채우고(read-through), put은 store에도 씁니다.
+    store에서 읽은 항목은 store의 만료 시각을 그대로 따르므로, 처음 저장한 뒤 ttl_seconds가 지나면 모든 복제본에서 만료됩니다.
+    store가 실패해도 로컬 캐시만으로 계속 동작합니다.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=2 * 1024 * 1024, ttl_seconds=6 * 60 * 60, store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.shared_hits = 0 # 로컬에는 없고 공유 저장소에서 찾은 횟수 (hits에도 포함)
+        self._entries = OrderedDict() # key -> (만료 시각(monotonic), 리포트, 크기)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        report = self._get_local(key)
+        if report is None:
+            report = self._get_shared(key)
+            with self._lock:
+                if report is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self.shared_hits += 1
+        return report
+
+    def _get_local(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, report, _ = entry
+            if now > expires_at:
+                self._remove(key)
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return report
+
+    def _get_shared(self, key):
+        if self.store is None:
+            return None
+        try:
+            entry = self.store.get_report(report_store_key(key))
+        except Exception:
+            logger.exception("shared report store read failed")
+            return None
+        if entry is None:
+            return None
+        report, expires_at = entry
+        # 로컬 TTL을 새로 시작하지 않고 store에 남은 시간만큼만 둡니다.
+        self._put_local(key, report, min(self.ttl_seconds, expires_at - time.time()))
+        return report
+
+    def contains(self, key):
+        """
+        적중/실패 카운터와 LRU 순서를 건드리지 않고 유효한 항목이 있는지만 확인합니다.
+        로컬에 없으면 공유 저장소도 확인하고, 있으면 로컬에 채워 둡니다.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() <= entry[0]:
+                return True
+        return self._get_shared(key) is not None
+
+    def put(self, key, report):
+        self._put_local(key, report)
+        if self.store is not None:
+            try:
+                self.store.put_report(report_store_key(key), report, self.ttl_seconds)
+            except Exception:
+                logger.exception("shared report store write failed")
+
+    def _put_local(self, key, report, ttl_seconds=None):
+        size = len(report.encode('utf-8'))
+        if size > self.max_bytes:
+            return # 한 항목이 전체 한도보다 크면 저장하지 않음
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl_seconds, report, size)
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'shared_hits': self.shared_hits,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+
+class InflightRequests:
+    """
+    진행 중인 리포트 생성 요청(Ticket)을 캐시 키별로 공유합니다.
+    같은 키의 요청이 이미 대기열/실행 중이면 새로 GPT를 호출하지 않고 그 요청에 합류합니다.
+    """
+
+    def __init__(self):
+        self._tickets = {}
+        self._lock = threading.Lock()
+
+    def get_or_submit(self, key, submit):
+        with self._lock:
+            # 취소된 요청은 워커가 실행하지 않아 discard()가 불리지 않으므로 여기서 치웁니다.
+            for stale_key in [k for k, t in self._tickets.items() if t.cancelled]:
+                del self._tickets[stale_key]
+            ticket = self._tickets.get(key)
+            if ticket is not None and ticket.error is None and ticket.join():
+                return ticket
+            ticket = submit()
+            self._tickets[key] = ticket
+            return ticket
+
+    def discard(self, key, ticket):
+        with self._lock:
+            if self._tickets.get(key) is ticket:
+                del self._tickets[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tickets)
+
+
+def make_cache_key(role, bucket, prompt_version):
+    return (role, bucket, prompt_version)
@@ -0,0 +1,91 @@
+import hashlib
+import re
+from html import escape
+
+# --- 리포트 후처리: 마크다운 -> 안전한 HTML ---
+# 리포트 마크다운을 <div> HTML 블록 안에 그대로 넣으면 Streamlit이 rerun마다 다시 파싱하고,
+# HTML 블록 안의 제목(##)과 목록(*)은 제대로 그려지지 않는 경우가 많습니다.
+# 생성이 끝났을 때 한 번만 HTML로 바꿔 내용 해시와 함께 세션에 두고, 이후 rerun에서는 그 HTML 조각을 그대로 보냅니다.
+#  - 모든 텍스트를 먼저 escape한 뒤 아래에서 만든 태그만 넣으므로, 모델 응답이나 참여자 이름에 든 HTML은 글자로만 보입니다.
+#  - 리포트에 쓰는 문법만 지원합니다: 제목(#), 목록(*, -, 1.), 구분선(---), 문단, **굵게**, *기울임*
+#  - 결과에는 빈 줄이 없어서 st.markdown이 하나의 HTML 블록으로 보고 안쪽을 다시 파싱하지 않습니다.
+
+_HEADING = re.compile(r'(#{1,6})\s+(.*?)\s*#*$')
+_BULLET = re.compile(r'[*\-+]\s+(.*)$')
+_ORDERED = re.compile(r'\d+[.)]\s+(.*)$')
+_RULE = re.compile(r'(?:-\s*){3,}$|(?:\*\s*){3,}$|(?:_\s*){3,}$')
+_BOLD = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+_ITALIC = re.compile(r'(?<![*\w])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?![*\w])')
+
+
+def render_inline(text):
+    """한 줄 안의 강조 표시를 HTML로 바꿉니다. (escape 먼저)"""
+    text = escape(text)
+    text = _BOLD.sub(r'<strong>\1</strong>', text)
+    return _ITALIC.sub(r'<em>\1</em>', text)
+
+
+def markdown_to_html(markdown):
+    """리포트 마크다운을 빈 줄 없는 HTML 조각으로 바꿉니다."""
+    blocks = []
+    paragraph = []
+    items = []
+    list_tag = None
+    after_blank = False
+
+    def close_paragraph():
+        if paragraph:
+            blocks.append('<p>' + '<br>'.join(render_inline(line) for line in paragraph) + '</p>')
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if items:
+            body = ''.join(f'<li>{render_inline(item)}</li>' for item in items)
+            blocks.append(f'<{list_tag}>{body}</{list_tag}>')
+            items.clear()
+        list_tag = None
+
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            close_paragraph()
+            after_blank = True
+            continue
+        heading = _HEADING.match(stripped)
+        bullet = _BULLET.match(stripped)
+        ordered = _ORDERED.match(stripped)
+        if _RULE.match(stripped):
+            close_paragraph()
+            close_list()
+            blocks.append('<hr>')
+        elif heading:
+            close_paragraph()
+            close_list()
+            level = len(heading.group(1))
+            blocks.append(f'<h{level}>{render_inline(heading.group(2))}</h{level}>')
+        elif bullet or ordered:
+            close_paragraph()
+            tag = 'ul' if bullet else 'ol'
+            if tag != list_tag:
+                close_list()
+                list_tag = tag
+            items.append((bullet or ordered).group(1))
+        elif items and not after_blank and line[:1].isspace():
+            items[-1] += ' ' + stripped # 목록 항목이 다음 줄로 이어지는 경우
+        else:
+            close_list()
+            paragraph.append(stripped)
+        after_blank = False
+    close_paragraph()
+    close_list()
+    return '\n'.join(blocks)
+
+
+def content_hash(markdown):
+    return hashlib.sha256(markdown.encode('utf-8')).hexdigest()[:16]
+
+
+def render_report(markdown):
+    """생성이 끝난 리포트를 한 번 변환합니다. {'hash': 원문 해시, 'html': HTML 조각}"""
+    return {'hash': content_hash(markdown), 'html': markdown_to_html(markdown)}
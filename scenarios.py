@@ -0,0 +1,132 @@
+import json
+from pathlib import Path
+
+import streamlit as st
+
+# --- 페이지 2 신청서 시나리오 ---
+# 역할(페르소나)별 입력 항목, 라벨 문구, CSS 클래스, 필수/금지 체크박스는 data/ 아래의 스펙 파일에 있습니다.
+# 스펙은 프로세스당 한 번만 읽어 역할마다 render()/validate() 클로저로 컴파일해 두고,
+# 세션마다 바뀌는 값(입력값, 체크 여부)만 st.session_state에 둡니다.
+# 새 역할을 추가할 때는 app.py를 고치지 말고 스펙 파일에 시나리오를 추가하면 됩니다.
+# (라벨/안내 문구는 HTML로 그대로 출력되므로 스펙 파일은 신뢰할 수 있는 사람만 편집해야 합니다.)
+
+SCENARIO_SPEC_PATH = Path(__file__).parent / 'data' / 'scenarios_v1.json'
+
+CHECKBOX_RULES = ('required', 'forbidden', 'optional')
+
+
+def load_scenario_specs(path=SCENARIO_SPEC_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Scenario:
+    """컴파일된 역할 하나. render/validate는 compile_scenario()가 만든 클로저입니다."""
+
+    def __init__(self, role, button_label, report_label, field_ids, checkbox_rules, render, validate):
+        self.role = role
+        self.button_label = button_label
+        self.report_label = report_label # 리포트 문장에 들어가는 역할 이름 (예: '고령자')
+        self.field_ids = field_ids
+        self.checkbox_rules = checkbox_rules # 체크박스 id -> 'required' / 'forbidden' / 'optional'
+        self.checkbox_ids = tuple(checkbox_rules)
+        self.render = render
+        self.validate = validate
+
+    def new_state(self):
+        """이 역할에 필요한 세션 상태만 만듭니다: (입력값 dict, 체크 여부 dict)."""
+        return dict.fromkeys(self.field_ids, ''), dict.fromkeys(self.checkbox_ids, False)
+
+    def is_wrong_toggle(self, checkbox_id, checked):
+        rule = self.checkbox_rules[checkbox_id]
+        return (rule == 'forbidden' and checked) or (rule == 'required' and not checked)
+
+
+def compile_scenario(spec, checkbox_sets, default_messages):
+    role = spec['role']
+    messages = dict(default_messages, **spec.get('messages', {}))
+    checkboxes = spec['checkboxes']
+    if isinstance(checkboxes, str): # 여러 역할이 같은 동의 항목을 쓰면 checkbox_sets의 이름으로 참조
+        checkboxes = checkbox_sets[checkboxes]
+
+    field_ids = tuple(field['id'] for field in spec['fields'])
+    if 'name' not in field_ids:
+        raise ValueError(f"scenario '{role}' must have a 'name' field (used in the AI report)")
+    for checkbox in checkboxes:
+        if checkbox.get('rule', 'optional') not in CHECKBOX_RULES:
+            raise ValueError(f"scenario '{role}': unknown checkbox rule {checkbox['rule']!r}")
+
+    # 라벨/안내 HTML과 위젯 key는 여기서 한 번만 만들어 둡니다.
+    label_class = spec.get('label_class', '')
+    help_class = spec.get('help_class', '')
+    checkbox_label_class = spec.get('checkbox_label_class', '')
+    fields = []
+    for field in spec['fields']:
+        key = f"{field['id']}_{role}_input"
+        label_html = f'<label for="{key}_text" class="{label_class}">{field["label"]}</label>'
+        help_html = f'<span class="{help_class}">{field["help"]}</span>' if field.get('help') else None
+        fields.append((field['id'], key, field.get('hidden_label', field['id']), label_html, help_html))
+    boxes = []
+    for checkbox in checkboxes:
+        key = f"{checkbox['id']}_{role}_c"
+        label_html = f'<label for="{key}" class="{checkbox_label_class}">{checkbox["text"]}</label>'
+        boxes.append((checkbox['id'], key, label_html))
+
+    required_fields = tuple(field['id'] for field in spec['fields'] if field.get('required', True))
+    required_checks = tuple(c['id'] for c in checkboxes if c.get('rule') == 'required')
+    forbidden_checks = tuple(c['id'] for c in checkboxes if c.get('rule') == 'forbidden')
+
+    def render(values, checks):
+        """입력 위젯을 그리고 현재 값을 values/checks에 바로 반영합니다."""
+        for field_id, key, hidden_label, label_html, help_html in fields:
+            with st.container(key=f"form-section-{field_id}"):
+                st.markdown(label_html, unsafe_allow_html=True)
+                values[field_id] = st.text_input(
+                    label=hidden_label,
+                    value=values[field_id],
+                    key=key,
+                    label_visibility="hidden"
+                )
+                if help_html:
+                    st.markdown(help_html, unsafe_allow_html=True)
+
+        with st.container(key="form-section-consent"):
+            for checkbox_id, key, label_html in boxes:
+                with st.container():
+                    col_chk, col_txt = st.columns([0.05, 0.95])
+                    with col_chk:
+                        checks[checkbox_id] = st.checkbox(label="", value=checks[checkbox_id], key=key)
+                    with col_txt:
+                        st.markdown(label_html, unsafe_allow_html=True)
+
+    def validate(values, checks):
+        """폼이 유효하면 None, 아니면 보여줄 오류 메시지 하나를 돌려줍니다. (입력 누락 > 필수 미체크 > 금지 체크 순)"""
+        if not all(values[field_id].strip() for field_id in required_fields):
+            return messages['missing_fields']
+        if not all(checks[checkbox_id] for checkbox_id in required_checks):
+            return messages['missing_required']
+        if any(checks[checkbox_id] for checkbox_id in forbidden_checks):
+            return messages['forbidden_checked']
+        return None
+
+    checkbox_rules = {c['id']: c.get('rule', 'optional') for c in checkboxes}
+    return Scenario(role, spec['button_label'], report_label(spec), field_ids, checkbox_rules, render, validate)
+
+
+def report_label(spec):
+    return spec.get('report_label', spec['button_label'])
+
+
+def role_labels(specs):
+    """{역할 id: 리포트용 표시 이름}. 리포트 백엔드가 'elderly' 같은 id 대신 이 이름을 씁니다."""
+    return {spec['role']: report_label(spec) for spec in specs['scenarios']}
+
+
+def compile_scenarios(specs):
+    """스펙 파일 전체를 {역할: Scenario}로 컴파일합니다. (페이지 1의 역할 버튼은 이 순서대로 표시)"""
+    checkbox_sets = specs.get('checkbox_sets', {})
+    messages = specs.get('messages', {})
+    return {
+        spec['role']: compile_scenario(spec, checkbox_sets, messages)
+        for spec in specs['scenarios']
+    }
@@ -0,0 +1,129 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# --- 서버 측 세션 저장소 ---
+# 키오스크 네트워크가 끊겨 웹소켓이 다시 연결되거나 브라우저를 새로 고치면 st.session_state가 사라집니다.
+# 진행 상태(페이지, 역할, 시작 시각, 입력값, 생성된 리포트 등)를 URL의 세션 토큰(?s=...)을 키로 여기에 저장해 두고,
+# 같은 토큰으로 다시 접속하면 복원합니다. 리포트도 복원되므로 페이지 3에서 GPT를 다시 호출하지 않습니다.
+#  - SQLite(WAL) 파일에 JSON으로 저장하고, 최근에 쓴 세션은 메모리 LRU에 둬서 조회 때 디스크를 읽지 않습니다.
+#  - ttl_seconds가 지난 세션은 복원하지 않으며, 저장할 때 가끔씩 한꺼번에 지웁니다.
+#  - 직렬화한 크기가 max_session_bytes를 넘는 세션은 저장하지 않습니다. (메모리/디스크 사용량 상한)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_DB = Path(__file__).parent / 'sessions' / 'sessions.sqlite3'
+
+
+class SessionStore:
+    def __init__(self, path=DEFAULT_SESSION_DB, ttl_seconds=6 * 60 * 60, max_cached=512,
+                 max_session_bytes=64 * 1024, purge_every=200):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_cached = max_cached
+        self.max_session_bytes = max_session_bytes
+        self.purge_every = purge_every
+        self.hits = 0
+        self.misses = 0
+        self.oversized = 0
+        self._saves = 0
+        self._cache = OrderedDict() # token -> (저장 시각, JSON 문자열)
+        self._lock = threading.Lock()
+        # 세션 스레드 여러 개가 같은 연결을 쓰므로 모든 접근을 _lock으로 직렬화합니다.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, updated_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self.purge_expired()
+
+    def _expired(self, updated_at, now):
+        return self.ttl_seconds and now - updated_at > self.ttl_seconds
+
+    def _remember(self, token, updated_at, data):
+        self._cache[token] = (updated_at, data)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def load(self, token):
+        """저장된 세션 dict를 돌려줍니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None:
+                self.hits += 1
+                self._cache.move_to_end(token)
+            else:
+                self.misses += 1
+                row = self._conn.execute(
+                    "SELECT updated_at, data FROM sessions WHERE token = ?", (token,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = row
+                self._remember(token, *entry)
+            updated_at, data = entry
+            if self._expired(updated_at, now):
+                self._cache.pop(token, None)
+                self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+                return None
+        return json.loads(data)
+
+    def save(self, token, state):
+        """
+        state(JSON으로 바꿀 수 있는 dict)를 저장합니다. 마지막으로 저장한 내용과 같으면 디스크에 쓰지 않습니다.
+        크기 상한을 넘으면 저장하지 않고 False를 돌려줍니다.
+        """
+        data = json.dumps(state, ensure_ascii=False, separators=(',', ':'))
+        if len(data.encode('utf-8')) > self.max_session_bytes:
+            self.oversized += 1
+            logger.warning("session %s is %d bytes; not persisted", token[:8], len(data.encode('utf-8')))
+            return False
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None and entry[1] == data:
+                return True
+            self._conn.execute(
+                "INSERT INTO sessions (token, updated_at, data) VALUES (?, ?, ?) "
+                "ON CONFLICT(token) DO UPDATE SET updated_at = excluded.updated_at, data = excluded.data",
+                (token, now, data),
+            )
+            self._remember(token, now, data)
+            self._saves += 1
+            purge = self.purge_every and self._saves % self.purge_every == 0
+        if purge:
+            self.purge_expired()
+        return True
+
+    def delete(self, token):
+        with self._lock:
+            self._cache.pop(token, None)
+            self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def purge_expired(self):
+        if not self.ttl_seconds:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            for token in [t for t, (updated_at, _) in self._cache.items() if updated_at < cutoff]:
+                del self._cache[token]
+            return self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+
+    def stats(self):
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return {
+                'cached': len(self._cache),
+                'stored': stored,
+                'hits': self.hits,
+                'misses': self.misses,
+                'oversized': self.oversized,
+            }
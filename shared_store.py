@@ -0,0 +1,132 @@
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# --- 여러 app.py 복제본(replica)이 함께 쓰는 공유 상태 ---
+# 로드 밸런서 뒤에 app.py를 여러 개 띄우면 리포트 캐시와 완료 시간 집계가 프로세스마다 따로 생깁니다.
+# 생성된 리포트와 집계 카운터를 여기에 두면 한 복제본이 만든 리포트를 다른 복제본이 재사용하고,
+# 페이지 3/4의 비교 통계도 모든 복제본의 참여자를 기준으로 보여줍니다.
+#
+# 매 rerun마다 저장소를 읽지 않도록 읽는 쪽(ReportCache, CompletionStats)이 크기가 제한된 로컬 사본을 두고,
+# 로컬에 없을 때만(리포트) 또는 refresh_seconds마다 한 번(집계) 저장소를 읽습니다.
+#
+# 저장소는 SharedStore의 메서드만 구현하면 되므로 네트워크 키-값 저장소(Redis 등)로 바꿀 수 있습니다.
+# 기본 제공 구현은 SQLite 파일을 WAL 모드로 쓰는 SQLiteSharedStore입니다. WAL은 같은 호스트의 공유 메모리를 쓰므로
+# 모든 복제본이 같은 호스트에서 로컬 디스크의 같은 파일을 열 때만 안전합니다. NFS/SMB 같은 네트워크 파일시스템에서는
+# 쓰지 마세요. 여러 호스트에 복제본을 띄우려면 서버형 저장소로 SharedStore를 구현해야 합니다.
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStore:
+    """
+    공유 저장소 인터페이스. 모든 메서드는 여러 프로세스/스레드에서 동시에 불려도 안전해야 합니다.
+      get_report(key)                       만료되지 않은 (리포트 문자열, 만료 시각(time.time() 기준)), 없으면 None
+      put_report(key, report, ttl_seconds)  리포트를 저장(있으면 덮어씀)
+      increment(namespace, deltas)          {이름: 증가량}을 한 번에 원자적으로 더함
+      counters(namespace)                   {이름: 값} 전체
+      add_if_absent(namespace, name, value) 없을 때만 값을 넣고, 넣었으면 True (복제본 중 하나만 하는 작업에 사용)
+    """
+
+    def get_report(self, key):
+        raise NotImplementedError
+
+    def put_report(self, key, report, ttl_seconds):
+        raise NotImplementedError
+
+    def increment(self, namespace, deltas):
+        raise NotImplementedError
+
+    def counters(self, namespace):
+        raise NotImplementedError
+
+    def add_if_absent(self, namespace, name, value):
+        raise NotImplementedError
+
+
+class SQLiteSharedStore(SharedStore):
+    """
+    SQLite 파일 하나에 리포트와 카운터를 둡니다. WAL 모드라서 읽기가 쓰기를 막지 않고,
+    카운터는 INSERT ... ON CONFLICT DO UPDATE 한 문장으로 더하므로 여러 프로세스가 동시에 더해도 값이 빠지지 않습니다.
+    """
+
+    def __init__(self, path, busy_timeout_seconds=5.0, purge_every=500):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.purge_every = purge_every
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=busy_timeout_seconds, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports (key TEXT PRIMARY KEY, report TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            "namespace TEXT NOT NULL, name TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (namespace, name))"
+        )
+
+    def get_report(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT report, expires_at FROM reports WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def put_report(self, key, report, ttl_seconds):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO reports (key, report, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET report = excluded.report, expires_at = excluded.expires_at",
+                (key, report, time.time() + ttl_seconds),
+            )
+            self._puts += 1
+            if self.purge_every and self._puts % self.purge_every == 0:
+                self._conn.execute("DELETE FROM reports WHERE expires_at <= ?", (time.time(),))
+
+    def increment(self, namespace, deltas):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO counters (namespace, name, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(namespace, name) DO UPDATE SET value = value + excluded.value",
+                    [(namespace, name, value) for name, value in deltas.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                # COMMIT이 실패해도(예: database is locked) 트랜잭션을 닫아야 공유 연결을 계속 쓸 수 있습니다.
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+
+    def counters(self, namespace):
+        with self._lock:
+            rows = self._conn.execute("SELECT name, value FROM counters WHERE namespace = ?", (namespace,)).fetchall()
+        return dict(rows)
+
+    def add_if_absent(self, namespace, name, value):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO counters (namespace, name, value) VALUES (?, ?, ?)", (namespace, name, value)
+            )
+        return cursor.rowcount == 1
+
+
+def make_shared_store(url):
+    """'sqlite:///<경로>' 형식의 주소로 저장소를 만듭니다. 다른 저장소는 SharedStore를 구현해 여기에 추가하면 됩니다."""
+    scheme, _, location = url.partition('://')
+    if scheme == 'sqlite' and location:
+        # sqlite:///상대/경로, sqlite:////절대/경로
+        return SQLiteSharedStore(location[1:] if location.startswith('/') else location)
+    raise ValueError(f"unsupported shared store url {url!r} (expected sqlite:///<path>)")
+
+
+def report_store_key(cache_key):
+    """(역할, 구간, 프롬프트 버전) 캐시 키를 저장소용 문자열로 바꿉니다."""
+    return '|'.join(str(part) for part in cache_key)
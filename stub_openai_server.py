@@ -0,0 +1,190 @@
+"""
+로컬 테스트용 OpenAI 호환 stub 서버.
+
+/v1/chat/completions 요청에 미리 준비된 리포트를 돌려줍니다 (stream=True 이면 SSE로 청크 단위 전송).
+요청에 response_format이 있으면 마크다운 대신 리포트 JSON(STUB_STRUCTURED_REPORT)을 돌려줍니다.
+실제 GPT-4o를 호출하지 않고 페이지 3의 스트리밍/지연/오류 처리를 확인할 때 사용합니다.
+
+사용법:
+    python stub_openai_server.py --port 8000 --latency 0.5 --token-delay 0.02
+
+그리고 .streamlit/secrets.toml 에 다음을 추가합니다:
+    OPENAI_API_KEY = "sk-local-stub"
+    OPENAI_BASE_URL = "http://127.0.0.1:8000/v1/"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_REPORT = """## 📌 참가자님이 마주한 '디지털 장벽' 분석
+
+폼을 작성하는 데 걸린 시간은 단순한 숫자가 아니라 **심리적, 인지적 부담**을 보여주는 지표입니다.
+
+## 🔍 역할군이 겪는 현실적인 어려움
+
+* **시각적 피로감**: 작은 글씨와 복잡한 화면 구성
+* **정보 이해의 어려움**: 낯선 전문 용어와 긴 안내문
+* **심리적 불안감**: 잘못 선택하면 불이익이 있다는 경고
+
+## 💡 모두를 위한 디지털 세상을 만드는 구체적인 방법
+
+* **디자인 측면**: 글자 크기 조절 기능 추가
+* **콘텐츠 측면**: 쉬운 용어 사용 및 설명 추가
+* **사회적 측면**: 찾아가는 디지털 교육 확대
+
+## ✨ 오늘의 경험이 우리에게 남긴 것
+
+기술의 발전이 **소외가 아닌 연결**을 만드는 데 기여할 수 있도록, 작은 관심이 큰 변화의 시작이 될 수 있습니다.
+"""
+
+STUB_STRUCTURED_REPORT = json.dumps({
+    'difficulties': [
+        {'title': '시각적 피로감', 'description': '작은 글씨와 복잡한 화면 구성 때문에 원하는 정보를 찾기 어렵습니다.'},
+        {'title': '정보 이해의 어려움', 'description': '낯선 전문 용어와 긴 안내문이 내용을 이해하는 데 부담이 됩니다.'},
+        {'title': '심리적 불안감', 'description': '잘못 선택하면 불이익이 있다는 경고가 망설이게 만듭니다.'},
+    ],
+    'proposals': {
+        'design': '글자 크기 조절 기능과 직관적인 아이콘을 제공합니다.',
+        'content': '쉬운 용어를 사용하고 어려운 단어에는 설명을 덧붙입니다.',
+        'social': '찾아가는 디지털 교육을 확대합니다.',
+    },
+}, ensure_ascii=False)
+
+
+def split_into_tokens(text, size=4):
+    # 실제 토크나이저 대신 글자 몇 개씩 잘라서 '토큰'처럼 보냅니다.
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # 서버 생성 시 make_handler()에서 설정합니다.
+    latency = 0.0
+    token_delay = 0.0
+    error_rate = 0.0
+    report = STUB_REPORT
+    structured_report = STUB_STRUCTURED_REPORT
+    stats = None # 처리한 요청 수 / 주입한 오류 수 (make_server()가 서버마다 새로 만듦)
+    stats_lock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        injected_error = bool(self.error_rate and random.random() < self.error_rate)
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats['errors'] += injected_error
+        if injected_error:
+            self._send_json(500, {'error': {'message': 'stub: injected server error', 'type': 'server_error'}})
+            return
+
+        report = self.structured_report if request.get('response_format') else self.report
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        prompt_text = ''.join(str(m.get('content', '')) for m in request.get('messages', []))
+        usage = {
+            'prompt_tokens': len(split_into_tokens(prompt_text)),
+            'completion_tokens': len(split_into_tokens(report)),
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        created = int(time.time())
+        model = request.get('model', 'gpt-4o')
+
+        if not request.get('stream'):
+            self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': report},
+                    'finish_reason': 'stop',
+                }],
+                'usage': usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        def send_event(delta, finish_reason=None, choices=True, usage=None):
+            payload = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}] if choices else [],
+            }
+            if usage is not None:
+                payload['usage'] = usage
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        send_event({'role': 'assistant', 'content': ''})
+        for token in split_into_tokens(report):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            send_event({'content': token})
+        send_event({}, finish_reason='stop')
+        if (request.get('stream_options') or {}).get('include_usage'):
+            send_event(None, choices=False, usage=usage) # OpenAI처럼 choices가 빈 마지막 청크에 usage
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_server(host='127.0.0.1', port=8000, latency=0.0, token_delay=0.0, error_rate=0.0):
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        'latency': latency,
+        'token_delay': token_delay,
+        'error_rate': error_rate,
+        'stats': {'requests': 0, 'errors': 0},
+        'stats_lock': threading.Lock(),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 로컬 stub 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help="첫 응답 전 대기 시간(초)")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="스트리밍 청크 사이 대기 시간(초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="500 오류를 돌려줄 확률 (0.0-1.0)")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.token_delay, args.error_rate)
+    print(f"Stub OpenAI server listening on http://{args.host}:{args.port}/v1/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+import atexit
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+# --- 참여자 상호작용 텔레메트리 ---
+# 페이지 2에서 생기는 이벤트(입력, 체크박스 토글, 오류 표시, 신청)를 메모리 링 버퍼에 넣기만 하고,
+# 백그라운드 스레드가 모아서 telemetry/ 폴더에 Parquet(또는 JSONL) 파일로 씁니다.
+# 스크립트 rerun은 디스크 I/O를 기다리지 않으며, 파일로 쓰인 이벤트는 프로세스를 재시작해도 남습니다.
+# flush마다 작은 파일이 하나씩 생기므로, 같은 스레드가 가끔 하루치 파일을 날짜별 파일 하나로 합칩니다.
+# (시작할 때 지난 기록을 읽는 iter_completions의 비용이 flush 횟수가 아니라 날짜 수에 비례하도록)
+# pyarrow는 import가 무거우므로(약 0.2초) 처음 파일을 쓰거나 읽을 때 불러옵니다.
+#
+# 이벤트 종류 (elapsed = 역할 선택 후 지난 초, duration = 같은 참여자의 직전 이벤트 이후 지난 초)
+#   form_started       역할 선택
+#   first_input        첫 입력 (Streamlit은 키 입력마다가 아니라 입력칸을 벗어나거나 Enter를 칠 때 값을 보냄)
+#   field_changed      입력칸 값 변경 (field = 항목 id, duration = 이 항목에 걸린 시간)
+#   checkbox_toggled   체크박스 변경 (detail = 'on' / 'off')
+#   wrong_checkbox     금지 항목을 체크하거나 필수 항목을 해제함
+#   validation_error   화면에 새 오류 메시지가 표시됨 (detail = 메시지)
+#   form_submitted     신청 버튼 클릭 (elapsed = 전체 소요 시간)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TELEMETRY_DIR = Path(__file__).parent / 'telemetry'
+
+@functools.lru_cache(maxsize=None)
+def event_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('ts', pa.float64()), # time.time()
+        ('participant_id', pa.string()),
+        ('role', pa.string()),
+        ('event', pa.string()),
+        ('field', pa.string()),
+        ('elapsed', pa.float64()),
+        ('duration', pa.float64()),
+        ('detail', pa.string()),
+    ])
+
+FORMATS = ('parquet', 'jsonl')
+
+
+class EventBuffer:
+    """크기가 고정된 링 버퍼. 가득 차면 가장 오래된 이벤트를 버리고 dropped를 셉니다."""
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.dropped = 0
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._events)
+
+    def append(self, event):
+        with self._lock:
+            if len(self._events) == self.capacity:
+                self.dropped += 1
+            self._events.append(event)
+
+    def drain(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def requeue(self, events):
+        # 쓰기에 실패한 배치를 다음 flush 때 다시 쓰도록 앞쪽에 되돌려 놓습니다.
+        with self._lock:
+            room = self.capacity - len(self._events)
+            self.dropped += max(len(events) - room, 0)
+            self._events.extendleft(reversed(events[-room:] if room > 0 else []))
+
+
+class EventLog:
+    """
+    record()는 버퍼에 넣기만 하고 바로 돌아옵니다. 백그라운드 스레드가 flush_seconds마다
+    (또는 버퍼에 batch_size개 이상 쌓이면 바로) 한 배치를 파일 하나로 씁니다.
+    파일은 임시 이름으로 다 쓴 뒤 os.replace로 옮기므로 읽는 쪽은 완성된 파일만 보게 됩니다.
+    """
+
+    def __init__(self, directory=DEFAULT_TELEMETRY_DIR, fmt='parquet', flush_seconds=2.0,
+                 batch_size=500, capacity=10000, compact_seconds=600, compact_min_files=50):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown telemetry format {fmt!r} (expected one of {FORMATS})")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.buffer = EventBuffer(capacity)
+        self.written = 0
+        self.write_errors = 0
+        self.compact_seconds = compact_seconds
+        self.compact_min_files = compact_min_files
+        self._next_compact = time.monotonic() # 시작 직후 한 번 합치고, 이후 compact_seconds마다
+        self._file_seq = itertools.count()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush) # 정상 종료 시 버퍼에 남은 이벤트도 씁니다.
+
+    def record(self, participant_id, role, event, field=None, elapsed=None, duration=None, detail=None):
+        self.buffer.append({
+            'ts': time.time(),
+            'participant_id': participant_id,
+            'role': role,
+            'event': event,
+            'field': field,
+            'elapsed': elapsed,
+            'duration': duration,
+            'detail': detail,
+        })
+        if len(self.buffer) >= self.batch_size:
+            self._wake.set()
+
+    def stats(self):
+        return {
+            'buffered': len(self.buffer),
+            'written': self.written,
+            'dropped': self.buffer.dropped,
+            'write_errors': self.write_errors,
+        }
+
+    def flush(self):
+        with self._flush_lock:
+            events = self.buffer.drain()
+            if not events:
+                return
+            try:
+                self._write(events)
+            except Exception:
+                logger.exception("failed to write %d telemetry events", len(events))
+                self.write_errors += 1
+                self.buffer.requeue(events)
+                return
+            self.written += len(events)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+            if self.compact_seconds and time.monotonic() >= self._next_compact:
+                self._next_compact = time.monotonic() + self.compact_seconds
+                try:
+                    with self._flush_lock:
+                        compact_event_files(self.directory, self.compact_min_files)
+                except Exception:
+                    logger.exception("failed to compact telemetry files")
+
+    def _write(self, events):
+        name = f"events-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._file_seq):06d}.{self.fmt}"
+        path = self.directory / name
+        tmp_path = path.with_name(path.name + '.tmp')
+        if self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.Table.from_pylist(events, schema=event_schema()), tmp_path)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, path)
+
+
+def _event_files(directory):
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob('events-*.parquet')) + sorted(directory.glob('events-*.jsonl'))
+
+
+def _iter_jsonl(path, columns=None):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                event = json.loads(line)
+                yield {k: event.get(k) for k in columns} if columns else event
+
+
+COMPACT_LOCK_NAME = '.compact.lock'
+COMPACT_LOCK_STALE_SECONDS = 600
+
+
+def _acquire_compact_lock(directory):
+    # 같은 폴더를 쓰는 여러 프로세스 중 하나만 합치도록 잠금 파일을 만듭니다. (죽은 프로세스가 남긴 잠금은 오래되면 치움)
+    path = Path(directory) / COMPACT_LOCK_NAME
+    for _ in range(2):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            try:
+                if time.time() - path.stat().st_mtime < COMPACT_LOCK_STALE_SECONDS:
+                    return None
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    return None
+
+
+def _merge_files(paths, target):
+    tmp_path = target.with_name(target.name + '.tmp')
+    if target.suffix == '.parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.concat_tables(pq.read_table(path, schema=event_schema()) for path in paths), tmp_path)
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            for path in paths:
+                with open(path, encoding='utf-8') as f:
+                    out.writelines(line for line in f if line.strip())
+    os.replace(tmp_path, target)
+
+
+def compact_event_files(directory=DEFAULT_TELEMETRY_DIR, min_files=50, today=None):
+    """
+    날짜별로 이벤트 파일을 하나로 합치고 합친 원본 파일 수를 돌려줍니다.
+    지난 날짜는 파일이 2개 이상이면, 오늘(today, 'YYYYMMDD')은 min_files개 이상 쌓였을 때 합칩니다.
+    합친 파일은 그 날짜의 마지막 파일 시각으로 이름을 붙이므로 이름 순서가 기록 순서와 어긋나지 않습니다.
+    """
+    today = today or time.strftime('%Y%m%d')
+    groups = {}
+    for path in _event_files(directory):
+        parts = path.stem.split('-') # events-YYYYMMDD-HHMMSS-...
+        if len(parts) >= 3 and parts[1].isdigit():
+            groups.setdefault((parts[1], path.suffix), []).append(path)
+    todo = {
+        key: paths for key, paths in groups.items()
+        if len(paths) >= (2 if key[0] < today else max(min_files, 2))
+    }
+    if not todo:
+        return 0
+    lock = _acquire_compact_lock(directory)
+    if lock is None:
+        return 0
+    merged = 0
+    try:
+        for (day, suffix), paths in todo.items():
+            last_time = paths[-1].stem.split('-')[2]
+            target = Path(directory) / f"events-{day}-{last_time}-{os.getpid()}-compact{int(time.time() * 1000)}{suffix}"
+            _merge_files(paths, target)
+            # 합친 파일을 먼저 완성한 뒤 원본을 지우므로, 중간에 멈춰도 이벤트가 사라지지는 않습니다.
+            for path in paths:
+                path.unlink(missing_ok=True)
+            merged += len(paths)
+    finally:
+        lock.unlink(missing_ok=True)
+    return merged
+
+
+def iter_completions(directory=DEFAULT_TELEMETRY_DIR):
+    """신청을 마친 기록마다 (역할, 소요 시간 초)를 돌려줍니다."""
+    columns = ['role', 'event', 'elapsed']
+    for path in _event_files(directory):
+        if path.suffix == '.parquet':
+            # form_submitted 행만 pyarrow에서 걸러 내 파이썬 객체를 최소한으로 만듭니다.
+            import pyarrow.compute as pc
+            import pyarrow.parquet as pq
+            table = pq.read_table(path, columns=columns)
+            table = table.filter(pc.and_(pc.equal(table['event'], 'form_submitted'), pc.is_valid(table['elapsed'])))
+            yield from zip(table['role'].to_pylist(), table['elapsed'].to_pylist())
+        else:
+            for event in _iter_jsonl(path, columns):
+                if event['event'] == 'form_submitted' and event['elapsed'] is not None:
+                    yield event['role'], event['elapsed']
@@ -0,0 +1,82 @@
+import math
+import random
+
+import pytest
+
+from completion_stats import CompletionStats, QuantileSketch
+from shared_store import SQLiteSharedStore
+
+
+def sample_seconds(n=5000, seed=7):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(math.log(40), 0.6) for _ in range(n)]
+
+
+@pytest.mark.parametrize('q', [0.1, 0.5, 0.9, 0.99])
+def test_quantile_within_relative_accuracy(q):
+    values = sample_seconds()
+    sketch = QuantileSketch(relative_accuracy=0.02)
+    for value in values:
+        sketch.add(value)
+    exact = sorted(values)[int(q * (len(values) - 1))]
+    assert abs(sketch.quantile(q) - exact) <= 0.02 * exact
+
+
+@pytest.mark.parametrize('seconds', [15.0, 40.0, 90.0])
+def test_rank_close_to_exact_fraction(seconds):
+    values = sample_seconds()
+    sketch = QuantileSketch(relative_accuracy=0.02)
+    for value in values:
+        sketch.add(value)
+    exact = sum(value < seconds for value in values) / len(values)
+    assert abs(sketch.rank(seconds) - exact) < 0.02
+
+
+def test_empty_sketch_has_no_answer():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None and sketch.rank(10.0) is None
+
+
+def test_replicas_merge_through_shared_store(tmp_path):
+    store = SQLiteSharedStore(tmp_path / 'shared.sqlite3')
+    first, second = CompletionStats(store=store), CompletionStats(store=store)
+    local = CompletionStats()
+    values = sample_seconds(400)
+    for i, seconds in enumerate(values):
+        (first if i % 2 else second).record('elderly', seconds)
+        local.record('elderly', seconds)
+    first.refresh(force=True)
+    merged, expected = first.summary('elderly'), local.summary('elderly')
+    assert merged.pop('mean') == pytest.approx(expected.pop('mean'))
+    assert merged == expected
+    assert first.slower_than('elderly', 50.0) == local.slower_than('elderly', 50.0)
+
+
+def test_refresh_is_rate_limited(tmp_path):
+    store = SQLiteSharedStore(tmp_path / 'shared.sqlite3')
+    reader = CompletionStats(store=store, refresh_seconds=60)
+    assert reader.summary('elderly') is None
+    CompletionStats(store=store).record('elderly', 30.0)
+    assert reader.summary('elderly') is None # refresh_seconds 안에서는 다시 읽지 않음
+    reader.refresh(force=True)
+    assert reader.summary('elderly')['count'] == 1
+
+
+def test_counters_from_other_bin_settings_are_skipped(tmp_path, caplog):
+    store = SQLiteSharedStore(tmp_path / 'shared.sqlite3')
+    CompletionStats(bin_seconds=10, store=store).record('elderly', 250.0)
+    other = CompletionStats(bin_seconds=30, store=store)
+    assert other.slower_than('elderly', 100.0) == (0.0, 1) # 구간 설정이 같은 스케치는 그대로 읽음
+    summary = other.summary('elderly')
+    assert len(summary['counts']) == 11 and sum(summary['counts']) == 0
+    assert 'different bin settings' in caplog.text
+
+
+def test_out_of_range_bin_index_is_skipped(tmp_path):
+    store = SQLiteSharedStore(tmp_path / 'shared.sqlite3')
+    stats = CompletionStats(store=store)
+    stats.record('elderly', 20.0)
+    hist_name = stats._roles['elderly'].histogram.counter_name()
+    store.increment('completion', {f'elderly|{hist_name}|999': 1})
+    stats.refresh(force=True)
+    assert sum(stats.summary('elderly')['counts']) == 1
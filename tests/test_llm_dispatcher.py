@@ -0,0 +1,179 @@
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+from tenacity import wait_none
+
+import llm_dispatcher
+from ai_report import ReportFormatError
+from llm_dispatcher import CircuitBreaker, CircuitOpenError, LLMDispatcher, TokenBucket
+
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx.Request('POST', 'http://127.0.0.1/v1/chat/completions'))
+
+
+@pytest.fixture(autouse=True)
+def no_retry_wait(monkeypatch):
+    # 재시도 사이의 지수 백오프를 없애 테스트를 빠르게 합니다.
+    monkeypatch.setattr(llm_dispatcher, 'wait_random_exponential', lambda **kwargs: wait_none())
+
+
+def run(dispatcher, fn, *args):
+    ticket = dispatcher.submit(fn, *args)
+    assert ticket.wait(5)
+    return ticket
+
+
+def failing(error, calls):
+    def fn(ticket):
+        calls.append(ticket.attempts)
+        raise error
+    return fn
+
+
+# --- TokenBucket ---
+
+def test_token_bucket_allows_burst_then_limits_rate():
+    bucket = TokenBucket(rate=20, burst=3)
+    started = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.04
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.04 # 네 번째는 약 1/20초를 기다림
+
+
+# --- CircuitBreaker ---
+
+def test_breaker_opens_after_threshold_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow_request()
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_breaker_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    assert breaker.allow_request()
+    assert not breaker.allow_request() # 시험 요청은 하나만
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_breaker_reopens_when_trial_fails():
+    breaker = CircuitBreaker(failure_threshold=5, cooldown_seconds=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+
+# --- LLMDispatcher ---
+
+def test_retries_count_as_one_breaker_failure():
+    dispatcher = LLMDispatcher(max_workers=1, rate_per_second=1000, burst=100, max_attempts=3,
+                               breaker=CircuitBreaker(failure_threshold=2, cooldown_seconds=60))
+    calls = []
+    ticket = run(dispatcher, failing(connection_error(), calls))
+    assert isinstance(ticket.error, openai.APIConnectionError)
+    assert calls == [1, 2, 3]
+    assert dispatcher.breaker.state == 'closed' # 3번 시도했지만 실패한 요청은 하나
+    run(dispatcher, failing(connection_error(), calls))
+    assert dispatcher.breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        dispatcher.submit(lambda ticket: None)
+
+
+def test_non_transient_errors_are_not_retried_or_counted():
+    dispatcher = LLMDispatcher(max_workers=1, rate_per_second=1000, burst=100, max_attempts=3,
+                               breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=60))
+    calls = []
+    ticket = run(dispatcher, failing(ReportFormatError("not json"), calls))
+    assert isinstance(ticket.error, ReportFormatError)
+    assert calls == [1]
+    assert dispatcher.breaker.state == 'closed'
+
+
+def test_retry_then_success_returns_result():
+    dispatcher = LLMDispatcher(max_workers=1, rate_per_second=1000, burst=100, max_attempts=3,
+                               breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=60))
+
+    def flaky(ticket):
+        if ticket.attempts == 1:
+            raise connection_error()
+        return 'report'
+
+    ticket = run(dispatcher, flaky)
+    assert ticket.result == 'report' and ticket.attempts == 2
+    assert dispatcher.breaker.state == 'closed'
+
+
+# --- Ticket cancel / join ---
+
+def blocked_dispatcher():
+    """워커 하나를 gate가 열릴 때까지 붙잡아 두어, 이후 제출한 티켓이 대기열에 머물게 합니다."""
+    dispatcher = LLMDispatcher(max_workers=1, rate_per_second=1000, burst=100)
+    gate = threading.Event()
+    dispatcher.submit(lambda ticket: gate.wait(5))
+    return dispatcher, gate
+
+
+def test_release_of_queued_ticket_cancels_it():
+    dispatcher, gate = blocked_dispatcher()
+    calls = []
+    ticket = dispatcher.submit(lambda t: calls.append(t))
+    ticket.release()
+    assert ticket.cancelled
+    assert not ticket.join() # 취소된 티켓에는 합류할 수 없음
+    gate.set()
+    assert ticket.wait(5)
+    assert calls == []
+
+
+def test_joined_ticket_survives_one_release():
+    dispatcher, gate = blocked_dispatcher()
+    ticket = dispatcher.submit(lambda t: 'report')
+    assert ticket.join()
+    ticket.release()
+    assert not ticket.cancelled
+    gate.set()
+    assert ticket.wait(5)
+    assert ticket.result == 'report'
+
+
+def test_release_after_start_does_not_cancel():
+    dispatcher = LLMDispatcher(max_workers=1, rate_per_second=1000, burst=100)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow(ticket):
+        started.set()
+        finish.wait(5)
+        return 'report'
+
+    ticket = dispatcher.submit(slow)
+    assert started.wait(5)
+    ticket.release()
+    assert not ticket.cancelled
+    finish.set()
+    assert ticket.wait(5)
+    assert ticket.result == 'report'
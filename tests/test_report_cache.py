@@ -0,0 +1,111 @@
+import pytest
+
+import report_cache
+from report_cache import ReportCache
+from shared_store import SQLiteSharedStore
+
+
+class FakeClock:
+    """report_cache.time 대신 쓰는 시계. monotonic()과 time()이 같이 움직입니다."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+class BrokenStore:
+    def get_report(self, key):
+        raise OSError("store down")
+
+    def put_report(self, key, report, ttl_seconds):
+        raise OSError("store down")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(report_cache, 'time', clock)
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = ReportCache(max_entries=2)
+    cache.put('a', "A")
+    cache.put('b', "B")
+    assert cache.get('a') == "A" # a를 최근에 사용함
+    cache.put('c', "C")
+    assert cache.get('b') is None
+    assert cache.get('a') == "A" and cache.get('c') == "C"
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_limit_evicts_and_oversized_reports_are_not_stored():
+    cache = ReportCache(max_bytes=10)
+    cache.put('a', "12345")
+    cache.put('b', "67890")
+    cache.put('c', "가") # 3 bytes → a가 밀려남
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 8
+    cache.put('big', "x" * 11)
+    assert cache.get('big') is None and cache.get('b') == "67890"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ReportCache(ttl_seconds=60)
+    cache.put('a', "A")
+    clock.now += 60
+    assert cache.contains('a') and cache.get('a') == "A"
+    clock.now += 1
+    assert not cache.contains('a')
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['misses']) == (0, 1, 1)
+
+
+def test_contains_does_not_touch_counters():
+    cache = ReportCache()
+    cache.put('a', "A")
+    assert cache.contains('a') and not cache.contains('b')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (0, 0)
+
+
+def test_report_from_another_replica_is_loaded_once(tmp_path):
+    path = tmp_path / 'shared.sqlite3'
+    ReportCache(store=SQLiteSharedStore(path)).put(('elderly', 1, 3), "리포트")
+    cache = ReportCache(store=SQLiteSharedStore(path))
+    assert cache.get(('elderly', 1, 3)) == "리포트"
+    assert cache.get(('elderly', 1, 3)) == "리포트"
+    stats = cache.stats()
+    assert (stats['hits'], stats['shared_hits'], stats['entries']) == (2, 1, 1)
+
+
+class OneReportStore:
+    """clock.now=1000에 다른 복제본이 ttl 60초로 저장한 리포트 하나를 가진 저장소."""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def get_report(self, key):
+        return ("리포트", 1060.0) if self.clock.now < 1060.0 else None
+
+
+def test_loaded_report_keeps_the_shared_expiry(clock):
+    clock.now += 50
+    cache = ReportCache(ttl_seconds=60, store=OneReportStore(clock))
+    assert cache.get('elderly|1|3') == "리포트"
+    clock.now += 11 # 처음 저장한 지 61초: 로컬에 채운 지는 11초지만 만료
+    assert not cache.contains('elderly|1|3')
+    assert cache.get('elderly|1|3') is None
+
+
+def test_store_failures_fall_back_to_local_cache():
+    cache = ReportCache(store=BrokenStore())
+    assert cache.get('a') is None
+    cache.put('a', "A")
+    assert cache.get('a') == "A"
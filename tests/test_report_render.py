@@ -0,0 +1,64 @@
+from ai_report import fill_report_placeholders
+from report_backends import LocalTemplateBackend
+from report_render import content_hash, markdown_to_html, render_inline, render_report
+from scenarios import load_scenario_specs, role_labels
+
+
+def test_script_tag_is_escaped():
+    html = markdown_to_html("<script>alert('x')</script>")
+    assert '<script>' not in html
+    assert '&lt;script&gt;' in html
+
+
+def test_inline_html_tags_are_shown_as_text():
+    html = render_inline('<b>굵게</b> <img src=x onerror=alert(1)>')
+    assert '<b>' not in html and '<img' not in html
+    assert '&lt;b&gt;굵게&lt;/b&gt;' in html
+
+
+def test_attribute_quotes_are_escaped():
+    assert '"' not in render_inline('" onmouseover="alert(1)')
+
+
+def test_participant_name_in_report_is_escaped():
+    report, _ = LocalTemplateBackend().generate('elderly', 42000)
+    html = markdown_to_html(fill_report_placeholders(report, '<b>홍길동</b>', 42))
+    assert '<b>' not in html
+    assert '&lt;b&gt;홍길동&lt;/b&gt;' in html
+
+
+def test_report_uses_scenario_label_not_role_id():
+    backend = LocalTemplateBackend(role_labels=role_labels(load_scenario_specs()))
+    report, _ = backend.generate('elderly', 42000)
+    assert "'고령자'" in report
+    assert 'elderly' not in report
+
+
+def test_bold_and_italic():
+    assert render_inline('**핵심** 과 *강조*') == '<strong>핵심</strong> 과 <em>강조</em>'
+    assert render_inline('2*3*4') == '2*3*4' # 단어 안의 별표는 그대로
+
+
+def test_headings_lists_and_paragraphs():
+    html = markdown_to_html("## 📌 제목\n\n첫 줄\n둘째 줄\n\n* **하나**: 설명\n* 둘\n\n1. 첫째\n2. 둘째\n\n---")
+    assert html.split('\n') == [
+        '<h2>📌 제목</h2>',
+        '<p>첫 줄<br>둘째 줄</p>',
+        '<ul><li><strong>하나</strong>: 설명</li><li>둘</li></ul>',
+        '<ol><li>첫째</li><li>둘째</li></ol>',
+        '<hr>',
+    ]
+
+
+def test_output_has_no_blank_lines():
+    # 빈 줄이 있으면 st.markdown이 HTML 블록을 끊고 나머지를 다시 마크다운으로 파싱합니다.
+    report, _ = LocalTemplateBackend().generate('foreigner', 95000)
+    assert '\n\n' not in markdown_to_html(report)
+
+
+def test_hash_is_stable_and_content_based():
+    rendered = render_report("## 리포트\n\n내용")
+    assert rendered == render_report("## 리포트\n\n내용")
+    assert rendered['hash'] == content_hash("## 리포트\n\n내용")
+    assert len(rendered['hash']) == 16
+    assert render_report("## 리포트\n\n다른 내용")['hash'] != rendered['hash']
@@ -0,0 +1,57 @@
+import sqlite3
+import time
+
+import pytest
+
+from shared_store import SQLiteSharedStore, make_shared_store
+
+
+class FailingCommit:
+    """COMMIT만 실패시키는 연결 래퍼 (다른 프로세스가 잠근 상황 흉내)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT":
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_counters_add_up_across_store_instances(tmp_path):
+    url = f"sqlite:///{tmp_path}/shared.sqlite3"
+    first, second = make_shared_store(url), make_shared_store(url)
+    first.increment('completion', {'elderly|count': 1, 'elderly|total': 12.5})
+    second.increment('completion', {'elderly|count': 1, 'elderly|total': 7.5})
+    assert first.counters('completion') == {'elderly|count': 2, 'elderly|total': 20.0}
+
+
+def test_reports_are_visible_to_other_instances(tmp_path):
+    path = tmp_path / 'shared.sqlite3'
+    SQLiteSharedStore(path).put_report('elderly|1|2', "리포트", ttl_seconds=60)
+    report, expires_at = SQLiteSharedStore(path).get_report('elderly|1|2')
+    assert report == "리포트"
+    assert 0 < expires_at - time.time() <= 60
+    SQLiteSharedStore(path).put_report('elderly|2|2', "만료", ttl_seconds=-1)
+    assert SQLiteSharedStore(path).get_report('elderly|2|2') is None
+
+
+def test_failed_commit_rolls_back_and_connection_stays_usable(tmp_path):
+    store = SQLiteSharedStore(tmp_path / 'shared.sqlite3')
+    conn = store._conn
+    store._conn = FailingCommit(conn)
+    with pytest.raises(sqlite3.OperationalError):
+        store.increment('completion', {'elderly|count': 1})
+    assert not conn.in_transaction
+    store._conn = conn
+    store.increment('completion', {'elderly|count': 1})
+    assert store.counters('completion') == {'elderly|count': 1}
+
+
+def test_add_if_absent_only_first_caller_wins(tmp_path):
+    store = SQLiteSharedStore(tmp_path / 'shared.sqlite3')
+    assert store.add_if_absent('meta', 'completion_seeded', 1)
+    assert not store.add_if_absent('meta', 'completion_seeded', 1)
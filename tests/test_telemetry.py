@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+
+from telemetry import COMPACT_LOCK_NAME, EventLog, _event_files, compact_event_files, iter_completions
+
+
+def write_batches(directory, fmt, batches):
+    log = EventLog(directory, fmt=fmt, flush_seconds=3600, compact_seconds=0)
+    for batch in batches:
+        for role, seconds in batch:
+            log.record('p', role, 'field_changed', field='name', elapsed=seconds / 2)
+            log.record('p', role, 'form_submitted', elapsed=seconds)
+        log.flush()
+    return log
+
+
+def rename_to_day(directory, day):
+    # 파일 이름의 날짜 부분만 바꿔 지난 날짜에 쓴 파일처럼 만듭니다.
+    for path in _event_files(directory):
+        parts = path.name.split('-')
+        parts[1] = day
+        path.rename(path.with_name('-'.join(parts)))
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'jsonl'])
+def test_past_day_files_are_merged_into_one(tmp_path, fmt):
+    batches = [[('elderly', 30.0)], [('foreigner', 45.5), ('elderly', 12.0)], [('elderly', 80.0)]]
+    write_batches(tmp_path, fmt, batches)
+    rename_to_day(tmp_path, '20260101')
+    before = sorted(iter_completions(tmp_path))
+    assert len(_event_files(tmp_path)) == 3
+
+    assert compact_event_files(tmp_path, today='20260102') == 3
+    files = _event_files(tmp_path)
+    assert len(files) == 1 and files[0].name.startswith('events-20260101-')
+    assert sorted(iter_completions(tmp_path)) == before
+
+
+def test_today_waits_for_min_files(tmp_path):
+    log = write_batches(tmp_path, 'jsonl', [[('elderly', 10.0)], [('elderly', 20.0)]])
+    rename_to_day(tmp_path, '20260102')
+    assert compact_event_files(tmp_path, min_files=3, today='20260102') == 0
+    log.record('p', 'elderly', 'form_submitted', elapsed=30.0)
+    log.flush()
+    rename_to_day(tmp_path, '20260102')
+    assert compact_event_files(tmp_path, min_files=3, today='20260102') == 3
+    assert sorted(seconds for _, seconds in iter_completions(tmp_path)) == [10.0, 20.0, 30.0]
+
+
+def test_compaction_skips_while_another_process_holds_the_lock(tmp_path):
+    write_batches(tmp_path, 'jsonl', [[('elderly', 10.0)], [('elderly', 20.0)]])
+    rename_to_day(tmp_path, '20260101')
+    (tmp_path / COMPACT_LOCK_NAME).touch()
+    assert compact_event_files(tmp_path, today='20260102') == 0
+    os.utime(tmp_path / COMPACT_LOCK_NAME, (0, 0)) # 오래된 잠금은 치우고 진행
+    assert compact_event_files(tmp_path, today='20260102') == 2
+    assert not (tmp_path / COMPACT_LOCK_NAME).exists()
+
+
+def test_merged_jsonl_keeps_every_event(tmp_path):
+    write_batches(tmp_path, 'jsonl', [[('elderly', 10.0)], [('foreigner', 20.0)]])
+    rename_to_day(tmp_path, '20260101')
+    compact_event_files(tmp_path, today='20260102')
+    [merged] = _event_files(tmp_path)
+    events = [json.loads(line) for line in merged.read_text(encoding='utf-8').splitlines()]
+    assert [e['event'] for e in events] == ['field_changed', 'form_submitted'] * 2